@@ -0,0 +1,166 @@
+import os
+import shutil
+import sqlite3
+import hashlib
+import argparse
+
+STORE_NAME = ".blobs"
+
+# Blobs are never modified after they are written
+BLOB_MODE = 0o444
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    path TEXT PRIMARY KEY,
+    sha1 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS refs_sha1 ON refs (sha1);
+"""
+
+class BlobStore:
+    """
+    Content-addressed store: every distinct file body is kept once under
+    objects/<aa>/<sha1>, and copies are hardlinks to that blob (or plain
+    copies where hardlinks are not possible). Blobs are always copied into
+    the store and made read-only; a file the store does not own is never
+    linked, so editing a source cannot change a blob.
+
+    Hashes are cached by (path, size, mtime) so unchanged files are only
+    ever read once. Files handed out by the store are shared, so callers
+    must replace them (write + os.replace) rather than write in place.
+    """
+    def __init__(self, root=STORE_NAME):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(root, "index.sqlite"))
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def blob_path(self, sha1):
+        return os.path.join(self.objects_dir, sha1[:2], sha1)
+
+    def hash_file(self, path):
+        """Returns the file's sha1, reading it only if it changed since last seen."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        row = self.db.execute("SELECT size, mtime_ns, sha1 FROM hashes WHERE path = ?",
+                              (path,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        sha1 = digest.hexdigest()
+        self.db.execute("INSERT OR REPLACE INTO hashes (path, size, mtime_ns, sha1) VALUES (?, ?, ?, ?)",
+                        (path, st.st_size, st.st_mtime_ns, sha1))
+        return sha1
+
+    def put_file(self, path):
+        """Adds a file's content to the store (if new) and returns its sha1."""
+        sha1 = self.hash_file(path)
+        blob = self.blob_path(sha1)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            tmp = blob + ".tmp"
+            # copy2 keeps the source mtime (wget -N and make-style checks rely on it)
+            shutil.copy2(path, tmp)
+            os.chmod(tmp, BLOB_MODE)
+            os.replace(tmp, blob)
+        return sha1
+
+    def materialize(self, sha1, dest):
+        """Makes dest a hardlink to (or copy of) the blob and records the reference."""
+        blob = self.blob_path(sha1)
+        dest = os.path.abspath(dest)
+        if not (os.path.exists(dest) and os.path.samefile(blob, dest)):
+            tmp = dest + ".blobtmp"
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            try:
+                os.link(blob, tmp)
+            except OSError:
+                shutil.copy2(blob, tmp)
+                os.chmod(tmp, os.stat(tmp).st_mode | 0o200)
+            # Swap atomically so a shared blob is never truncated through dest
+            os.replace(tmp, dest)
+        st = os.stat(dest)
+        self.db.execute("INSERT OR REPLACE INTO hashes (path, size, mtime_ns, sha1) VALUES (?, ?, ?, ?)",
+                        (dest, st.st_size, st.st_mtime_ns, sha1))
+        self.db.execute("INSERT OR REPLACE INTO refs (path, sha1) VALUES (?, ?)", (dest, sha1))
+
+    def copy(self, src, dest):
+        """Deduplicating replacement for shutil.copy2."""
+        sha1 = self.put_file(src)
+        self.materialize(sha1, dest)
+        return sha1
+
+    def ingest(self, path):
+        """
+        Replaces a freshly written output file with a reference to its blob.
+        path becomes a read-only shared inode, so never ingest source files
+        (e.g. the wget mirror in old/) that something may rewrite in place.
+        """
+        return self.copy(path, path)
+
+    def lookup(self, sha1):
+        """All recorded paths sharing the given content."""
+        return [row[0] for row in self.db.execute(
+            "SELECT path FROM refs WHERE sha1 = ? ORDER BY path", (sha1,))]
+
+    def duplicates(self):
+        """(sha1, count) for every blob referenced from more than one path."""
+        return list(self.db.execute(
+            "SELECT sha1, COUNT(*) FROM refs GROUP BY sha1 HAVING COUNT(*) > 1 ORDER BY COUNT(*) DESC"))
+
+def dedupe_tree(store, root):
+    """
+    Replaces byte-identical files under an output tree (e.g. new/) with
+    links to a single blob. Source trees must not be deduplicated in place;
+    see BlobStore.ingest.
+    """
+    files = 0
+    saved = 0
+    seen = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        if os.path.abspath(dirpath).startswith(os.path.abspath(store.root)):
+            dirnames[:] = []
+            continue
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if os.path.islink(path):
+                continue
+            sha1 = store.ingest(path)
+            files += 1
+            if sha1 in seen:
+                saved += os.path.getsize(path)
+            seen.add(sha1)
+    store.db.commit()
+    return files, len(seen), saved
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate a tree into the content-addressed store.")
+    parser.add_argument('root', help="output directory to deduplicate, e.g. new (never a source tree like old)")
+    parser.add_argument('--store', default=STORE_NAME, help="store directory")
+    args = parser.parse_args()
+
+    with BlobStore(args.store) as store:
+        files, unique, saved = dedupe_tree(store, args.root)
+    print(f"Files: {files}, unique blobs: {unique}, bytes saved: {saved}")
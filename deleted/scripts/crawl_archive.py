@@ -0,0 +1,244 @@
+import io
+import os
+import gzip
+import hashlib
+import argparse
+import mimetypes
+from datetime import datetime, timezone
+from urllib.parse import quote
+from email.utils import formatdate, parsedate_to_datetime
+
+INDEX_SUFFIX = ".cdx"
+DEFAULT_ARCHIVE = "site.warc.gz"
+DEFAULT_BASE_URL = "https://www.aurelsystems.com/"
+
+# Source names of the form "warc:<url>" are read from an archive instead of disk
+REPLAY_PREFIX = "warc:"
+
+STATUS_TEXT = {200: 'OK', 301: 'Moved Permanently', 302: 'Found', 304: 'Not Modified', 404: 'Not Found'}
+
+class ArchiveRecord:
+    def __init__(self, url, status, headers, body, date=None):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.date = date
+
+    @property
+    def content_type(self):
+        return self.headers.get('Content-Type', '')
+
+    def text(self):
+        return self.body.decode('utf-8', errors='ignore')
+
+def normalize_key(url):
+    """Index key: the same page with or without a trailing slash is one entry."""
+    base, sep, query = url.partition('?')
+    return base.rstrip('/') + (sep + query if sep else '')
+
+class ArchiveWriter:
+    """
+    Appends WARC/1.1 'response' records to a .warc.gz file. Each record is
+    its own gzip member, so a record can be read by seeking to its offset,
+    and a <archive>.cdx index (url, offset, length, status, type, sha1) is
+    written alongside.
+    """
+    def __init__(self, path=DEFAULT_ARCHIVE):
+        self.path = path
+        self._file = open(path, 'ab')
+        self._index = open(path + INDEX_SUFFIX, 'a', encoding='utf-8')
+
+    def write_response(self, url, status, headers, body):
+        http_head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        http_head += ''.join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+        block = http_head.encode('utf-8') + body
+        sha1 = hashlib.sha1(body).hexdigest()
+        warc_head = (
+            "WARC/1.1\r\n"
+            "WARC-Type: response\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+            f"WARC-Payload-Digest: sha1:{sha1}\r\n"
+            "Content-Type: application/http; msgtype=response\r\n"
+            f"Content-Length: {len(block)}\r\n\r\n"
+        ).encode('utf-8')
+        member = gzip.compress(warc_head + block + b"\r\n\r\n")
+
+        offset = self._file.tell()
+        self._file.write(member)
+        content_type = headers.get('Content-Type', '').replace('\t', ' ')
+        self._index.write(f"{normalize_key(url)}\t{offset}\t{len(member)}\t{status}\t{content_type}\t{sha1}\n")
+
+    def close(self):
+        self._file.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ArchiveReader:
+    """Random access to an archive by URL; only the .cdx index is kept in memory."""
+    def __init__(self, path=DEFAULT_ARCHIVE):
+        self.path = path
+        self.entries = {}
+        with open(path + INDEX_SUFFIX, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) == 6:
+                    # Later records for the same URL win
+                    self.entries[parts[0]] = (int(parts[1]), int(parts[2]), int(parts[3]),
+                                              parts[4], parts[5])
+        self._file = open(path, 'rb')
+
+    def __contains__(self, url):
+        return normalize_key(url) in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def urls(self):
+        return list(self.entries)
+
+    def digest(self, url):
+        entry = self.entries.get(normalize_key(url))
+        return entry[4] if entry else None
+
+    def get(self, url):
+        """Returns the ArchiveRecord for url, or None if it was never archived."""
+        entry = self.entries.get(normalize_key(url))
+        if entry is None:
+            return None
+        offset, length = entry[0], entry[1]
+        # pread leaves the shared file position alone, so forked pool workers
+        # can read through a reader inherited from the parent
+        data = gzip.decompress(os.pread(self._file.fileno(), length, offset))
+
+        warc_head, _, rest = data.partition(b"\r\n\r\n")
+        warc = dict(line.split(': ', 1) for line in warc_head.decode('utf-8').split('\r\n')[1:])
+        block = rest[:int(warc['Content-Length'])]
+        http_head, _, body = block.partition(b"\r\n\r\n")
+        lines = http_head.decode('utf-8').split('\r\n')
+        status = int(lines[0].split()[1])
+        headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+        return ArchiveRecord(warc['WARC-Target-URI'], status, headers, body, warc.get('WARC-Date'))
+
+    def open_text(self, url):
+        """The archived body as a text stream, for code that reads files."""
+        return io.StringIO(self.get(url).text())
+
+    def close(self):
+        self._file.close()
+
+def page_slugs(reader, base_url=DEFAULT_BASE_URL):
+    """
+    (url, slug) for every archived HTML page, the archive counterpart of the
+    'dir/index.html' files migrate_content walks. Query variants and files
+    with an extension (assets, feeds saved as files) are left out.
+    """
+    root = normalize_key(base_url)
+    pages = []
+    for url, entry in reader.entries.items():
+        if '?' in url or not entry[3].startswith('text/html') or not url.startswith(root):
+            continue
+        slug = url[len(root):].strip('/')
+        if '.' in slug.rsplit('/', 1)[-1]:
+            continue
+        pages.append((url, slug))
+    return sorted(pages)
+
+_readers = {}
+
+def reader_for(archive_path):
+    """One open reader per archive per process (pool workers included)."""
+    if archive_path not in _readers:
+        _readers[archive_path] = ArchiveReader(archive_path)
+    return _readers[archive_path]
+
+def open_source(src, archive_path=None):
+    """Opens a file path, or a "warc:<url>" source from the archive, as text."""
+    if src.startswith(REPLAY_PREFIX):
+        return reader_for(archive_path).open_text(src[len(REPLAY_PREFIX):])
+    return open(src, 'r', encoding='utf-8', errors='ignore')
+
+def source_mtime(src, archive_path=None):
+    """
+    When a source was last modified: a file's mtime, or an archived page's
+    Last-Modified header. None if the archive does not say.
+    """
+    if not src.startswith(REPLAY_PREFIX):
+        return os.path.getmtime(src)
+    record = reader_for(archive_path).get(src[len(REPLAY_PREFIX):])
+    value = record.headers.get('Last-Modified') if record else None
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+def mirror_url(rel_path, base_url=DEFAULT_BASE_URL):
+    """
+    URL of a file in a wget mirror. 'dir/index.html' is the page 'dir/', and
+    'index.html p=1114.html' is the query variant '?p=1114' (wget replaced
+    the '?' in those names).
+    """
+    directory, name = os.path.split(rel_path.replace(os.sep, '/'))
+    prefix = base_url + (quote(directory) + '/' if directory else '')
+    if name == 'index.html':
+        return prefix
+    if name.startswith('index.html ') and name.endswith('.html'):
+        return prefix + '?' + name[len('index.html '):-len('.html')]
+    return prefix + quote(name)
+
+def import_mirror(mirror_dir, archive_path=DEFAULT_ARCHIVE, base_url=DEFAULT_BASE_URL):
+    """Packs a wget mirror (e.g. deleted/old) into an archive."""
+    count = 0
+    with ArchiveWriter(archive_path) as writer:
+        for dirpath, dirnames, filenames in os.walk(mirror_dir):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(path, mirror_dir)
+                content_type = 'text/html; charset=UTF-8' if name.startswith('index.html') \
+                    else mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                with open(path, 'rb') as f:
+                    body = f.read()
+                # wget -N set the mtime from the server's Last-Modified; keep it
+                writer.write_response(mirror_url(rel_path, base_url), 200,
+                                      {'Content-Type': content_type,
+                                       'Content-Length': str(len(body)),
+                                       'Last-Modified': formatdate(os.path.getmtime(path), usegmt=True)},
+                                      body)
+                count += 1
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect an offline crawl archive.")
+    parser.add_argument('--archive', default=DEFAULT_ARCHIVE)
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help="pack a wget mirror into the archive")
+    imp.add_argument('mirror', help="mirror directory, e.g. old")
+    imp.add_argument('--base-url', default=DEFAULT_BASE_URL)
+    sub.add_parser('list', help="list archived URLs")
+    show = sub.add_parser('get', help="print one archived body")
+    show.add_argument('url')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        for stale in (args.archive, args.archive + INDEX_SUFFIX):
+            if os.path.exists(stale):
+                os.remove(stale)
+        count = import_mirror(args.mirror, args.archive, args.base_url)
+        print(f"Archived {count} files into {args.archive} "
+              f"({os.path.getsize(args.archive) / 1e6:.1f} MB)")
+    else:
+        reader = ArchiveReader(args.archive)
+        if args.command == 'list':
+            for url in reader.urls():
+                print(url)
+        else:
+            record = reader.get(args.url)
+            print(record.text() if record else f"Not archived: {args.url}")
+        reader.close()
@@ -0,0 +1,326 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+import functools
+from urllib.parse import urlparse, urlunparse
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import aiohttp  # Requires: pip install aiohttp
+
+from website_crawler import WebsiteCrawler
+from crawl_state import CrawlState
+from crawl_output import CrawlOutput
+from url_frontier import WORDPRESS_PARAMS
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crawl_archive import ArchiveReader, ArchiveWriter
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+class TokenBucket:
+    """Per-host rate limit: 'rate' requests per second with bursts up to 'burst'."""
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncWebsiteCrawler(WebsiteCrawler):
+    """
+    Concurrent crawl engine. Pages are fetched by a fixed pool of workers
+    over one keep-alive connection pool; politeness comes from a per-host
+    token bucket instead of a fixed sleep before every link. Extraction,
+    link map and output are shared with WebsiteCrawler.
+
+    fetch_origin lets the crawl run against a mirror: URLs keep the site's
+    own domain but are requested from e.g. http://127.0.0.1:8000.
+
+    With a CrawlState, progress is checkpointed (an interrupted crawl picks
+    up its frontier on the next run) and pages are fetched conditionally;
+    a 304 reuses the stored page data without parsing.
+
+    The queue is a priority queue fed by the shared Frontier, so pages are
+    still taken by (depth, discovery order) while several are in flight.
+
+    archive/replay work as in WebsiteCrawler; a replayed crawl never opens
+    a connection.
+    """
+    def __init__(self, base_url, concurrency=8, rate=5.0, burst=None,
+                 fetch_origin=None, max_pages=None, timeout=10, state=None, output=None,
+                 keep_params=(), max_depth=None, archive=None, replay=None):
+        super().__init__(base_url, delay=0, output=output,
+                         keep_params=keep_params, max_depth=max_depth,
+                         archive=archive, replay=replay)
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst or concurrency
+        self.fetch_origin = urlparse(fetch_origin) if fetch_origin else None
+        self.max_pages = max_pages
+        # URLs fetched or queued so far; max_pages caps this, not links seen
+        self.admitted = 0
+        self.timeout = timeout
+        self.state = state
+        self.buckets = {}
+        self.errors = {}
+        self.changed = []
+        self.not_modified = []
+
+    def fetch_url(self, url):
+        """Where a (normalized) site URL is actually requested from."""
+        if not self.fetch_origin:
+            return url
+        parsed = urlparse(url)
+        return urlunparse((self.fetch_origin.scheme, self.fetch_origin.netloc,
+                           parsed.path or '/', '', parsed.query, ''))
+
+    def fetch_seed(self, url):
+        return super().fetch_seed(url if self.replay else self.fetch_url(url))
+
+    def bucket_for(self, url):
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return self.buckets[host]
+
+    async def fetch(self, session, url):
+        """
+        Returns (body, not_modified). body is None for non-HTML responses;
+        on a 304 it is the cached body and not_modified is True.
+        """
+        if self.replay:
+            record = self.replay.get(url)
+            if record is not None and 'html' not in record.content_type:
+                return None, False
+            return self.replayed_body(url), False
+        target = self.fetch_url(url)
+        headers = self.state.conditional_headers(url) if self.state else {}
+        await self.bucket_for(target).acquire()
+        async with session.get(target, headers=headers) as response:
+            if response.status == 304 and self.state:
+                body, etag, last_modified = self.state.cached_response(url)
+                # The archive must hold every page, not only the ones that changed
+                headers = {'Content-Type': 'text/html'}
+                if etag:
+                    headers['ETag'] = etag
+                if last_modified:
+                    headers['Last-Modified'] = last_modified
+                self.archive_response(url, 200, headers, body)
+                return body, True
+            response.raise_for_status()
+            is_html = 'html' in response.headers.get('Content-Type', 'text/html')
+            if not is_html and not self.archive:
+                return None, False
+            body = await response.read()
+            self.archive_response(url, response.status, response.headers, body)
+            if not is_html:
+                return None, False
+            if self.state:
+                self.state.store_response(url, body,
+                                          response.headers.get('ETag'),
+                                          response.headers.get('Last-Modified'))
+            return body, False
+
+    def admit(self, url, depth):
+        """Frontier entry for url if it is new and the max_pages budget allows, else None."""
+        if self.max_pages and self.admitted >= self.max_pages:
+            return None
+        entry = self.frontier.discover(url, depth)
+        if entry:
+            self.admitted += 1
+        return entry
+
+    def record_page(self, url, page_data, depth=0):
+        """Stores a parsed page and returns frontier entries for links not yet seen."""
+        self.store_page(url, page_data)
+        entries = []
+        for link in page_data['internal_links']:
+            entry = self.admit(link['url'], depth + 1)
+            if entry:
+                entries.append(entry)
+        return entries
+
+    def enqueue(self, queue, entry):
+        if self.state:
+            depth, seq, url = entry
+            self.state.enqueue(url, depth, seq)
+        queue.put_nowait(entry)
+
+    async def handle(self, session, queue, entry):
+        depth, _, url = entry
+        print(f"Crawling: {url}")
+        try:
+            body, not_modified = await self.fetch(session, url)
+            if body is not None:
+                page_data = self.state.load_page(url) if not_modified else None
+                if page_data is None:
+                    # Parsing is CPU-bound; keep the event loop free for fetches
+                    page_data = await asyncio.to_thread(self.parse_page, body, url)
+                    if self.state:
+                        self.state.save_page(url, page_data)
+                (self.not_modified if not_modified else self.changed).append(url)
+                for new_entry in self.record_page(url, page_data, depth):
+                    self.enqueue(queue, new_entry)
+        except Exception as e:
+            self.errors[url] = str(e)
+            print(f"Error crawling {url}: {str(e)}")
+        # Not reached on cancellation, so an interrupted URL stays in the frontier
+        if self.state:
+            self.state.mark_done(url)
+            if self.output:
+                # The page is already flushed to the stream; commit it as done
+                # too, so a crash cannot make the resume write it again
+                self.state.checkpoint()
+
+    async def worker(self, session, queue):
+        while True:
+            entry = await queue.get()
+            try:
+                await self.handle(session, queue, entry)
+            finally:
+                queue.task_done()
+
+    async def crawl_async(self, start_url=None, seed=False):
+        start = self.normalize_url(start_url or self.base_url)
+        queue = asyncio.PriorityQueue()
+
+        if self.state and self.state.is_resumable(self.base_url):
+            done = self.state.visited()
+            frontier = self.state.frontier()
+            print(f"Resuming crawl: {len(done)} done, {len(frontier)} queued")
+            self.visited.update(done)
+            self.admitted = len(done)
+            for url, depth, seq in frontier:
+                entry = self.frontier.discover(url, depth, seq)
+                if entry:
+                    self.admitted += 1
+                    queue.put_nowait(entry)
+            # A streamed run already has these pages on disk. Their links were
+            # admitted by the interrupted run, so only the pages are restored.
+            if not self.output:
+                for url, page_data in self.state.pages_for(done):
+                    self.store_page(url, page_data)
+        else:
+            if self.state:
+                self.state.start(self.base_url)
+            self.enqueue(queue, self.admit(start, 0))
+            if seed:
+                seeds = await asyncio.to_thread(self.collect_seeds, self.fetch_seed)
+                print(f"Seeded {len(seeds)} URLs from sitemaps and feeds")
+                for url in seeds:
+                    entry = self.admit(url, 1)
+                    if entry:
+                        self.enqueue(queue, entry)
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=30)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={'User-Agent': USER_AGENT}) as session:
+            workers = [asyncio.create_task(self.worker(session, queue))
+                       for _ in range(self.concurrency)]
+            try:
+                await queue.join()
+                if self.state:
+                    self.state.finish()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if self.state:
+                    self.state.checkpoint()
+
+    def crawl(self, start_url=None, seed=False):
+        """Runs a full crawl; iterative, so deep sites never hit the recursion limit."""
+        asyncio.run(self.crawl_async(start_url, seed))
+
+def serve_directory(directory, port=0):
+    """Serves a mirror (e.g. deleted/old) on localhost; returns (server, origin)."""
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = QuietServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+class QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients dropping connections (e.g. an interrupted crawl) are expected
+        pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent website crawler for migration.")
+    parser.add_argument('base_url', nargs='?', default="https://www.aurelsystems.com/")
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help="parallel requests")
+    parser.add_argument('-r', '--rate', type=float, default=5.0, help="requests per second per host")
+    parser.add_argument('--origin', help="fetch pages from this origin instead (e.g. a local mirror)")
+    parser.add_argument('--serve', help="serve this directory locally and crawl it (e.g. ../../old)")
+    parser.add_argument('--max-pages', type=int, help="fetch at most this many URLs")
+    parser.add_argument('--max-depth', type=int, help="do not follow links deeper than this")
+    parser.add_argument('--seed', action='store_true', help="seed the frontier from sitemaps and feeds")
+    parser.add_argument('--keep-param', action='append', default=[], metavar='NAME',
+                        help="query parameter that selects a distinct page (repeatable)")
+    parser.add_argument('--wordpress-params', action='store_true',
+                        help="keep WordPress id parameters (" + ", ".join(WORDPRESS_PARAMS) + ")")
+    parser.add_argument('--all-params', action='store_true',
+                        help="keep every query parameter except known tracking ones")
+    parser.add_argument('--state', help="crawl state database; enables resume and conditional requests")
+    parser.add_argument('--archive', help="also write every response to this crawl archive")
+    parser.add_argument('--replay', help="crawl offline from this crawl archive")
+    parser.add_argument('-o', '--output', default='website_migration_data.json')
+    parser.add_argument('--stream', metavar='PREFIX',
+                        help="write PREFIX.pages.ndjson and PREFIX.edges.tsv as pages are crawled")
+    args = parser.parse_args()
+
+    keep_params = tuple(args.keep_param) + (WORDPRESS_PARAMS if args.wordpress_params else ())
+    if args.all_params:
+        keep_params = None
+
+    server = None
+    origin = args.origin
+    if args.serve:
+        server, origin = serve_directory(os.path.abspath(args.serve))
+        print(f"Serving {args.serve} at {origin}")
+
+    crawler = AsyncWebsiteCrawler(args.base_url, concurrency=args.concurrency, rate=args.rate,
+                                  fetch_origin=origin, max_pages=args.max_pages,
+                                  keep_params=keep_params, max_depth=args.max_depth,
+                                  state=CrawlState(args.state) if args.state else None,
+                                  archive=ArchiveWriter(args.archive) if args.archive else None,
+                                  replay=ArchiveReader(args.replay) if args.replay else None)
+    if args.stream:
+        resuming = crawler.state is not None and crawler.state.is_resumable(crawler.base_url)
+        crawler.output = CrawlOutput(args.stream, append=resuming)
+    started = time.monotonic()
+    try:
+        crawler.crawl(seed=args.seed)
+    except KeyboardInterrupt:
+        print("\n\nCrawl interrupted by user.")
+    finally:
+        if server:
+            server.shutdown()
+        if crawler.state:
+            crawler.state.close()
+        if crawler.archive:
+            crawler.archive.close()
+
+    crawler.save_results(args.output)
+    print(f"Errors: {len(crawler.errors)}")
+    if crawler.state:
+        print(f"Changed: {len(crawler.changed)}, not modified (304): {len(crawler.not_modified)}")
+    print(f"Elapsed: {time.monotonic() - started:.1f}s")
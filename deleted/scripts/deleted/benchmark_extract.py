@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import warnings
+import argparse
+
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+from website_crawler import WebsiteCrawler
+
+warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)
+
+def load_pages(root):
+    """All mirrored pages under root as (url, body) pairs."""
+    pages = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            if name.startswith('index.html'):
+                rel = os.path.relpath(dirpath, root).replace(os.sep, '/')
+                url = "https://www.aurelsystems.com/" + ('' if rel == '.' else rel)
+                with open(os.path.join(dirpath, name), 'rb') as f:
+                    pages.append((url, f.read()))
+    return pages
+
+def time_engine(extract, pages, rounds):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for url, body in pages:
+            extract(body, url)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def same_result(a, b):
+    """extract_content groups headings by level; the single pass keeps document order."""
+    key = lambda h: h['level']
+    return dict(a, headings=sorted(a['headings'], key=key)) == \
+           dict(b, headings=sorted(b['headings'], key=key))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark page extraction engines on the legacy mirror.")
+    parser.add_argument('root', nargs='?', default=os.path.join('..', '..', 'old'))
+    parser.add_argument('-n', '--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    crawler = WebsiteCrawler("https://www.aurelsystems.com/")
+    pages = load_pages(args.root)
+    total_bytes = sum(len(body) for _, body in pages)
+    print(f"Pages: {len(pages)} ({total_bytes / 1e6:.1f} MB)")
+
+    def soup_engine(body, url):
+        return crawler.extract_content(BeautifulSoup(body, 'html.parser'), url)
+
+    mismatches = [url for url, body in pages
+                  if not same_result(soup_engine(body, url), crawler.parse_page(body, url))]
+
+    soup_time = time_engine(soup_engine, pages, args.rounds)
+    fast_time = time_engine(crawler.parse_page, pages, args.rounds)
+
+    print(f"BeautifulSoup + find_all: {soup_time:.3f}s")
+    print(f"Single-pass extractor:    {fast_time:.3f}s")
+    print(f"Speedup: {soup_time / fast_time:.1f}x")
+    print(f"Mismatching pages: {len(mismatches)}")
+    for url in mismatches:
+        print(f"  {url}")
+    sys.exit(1 if mismatches else 0)
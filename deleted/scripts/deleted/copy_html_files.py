@@ -1,5 +1,8 @@
 import os
-import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from blob_store import BlobStore
 
 def copy_html_files():
 
@@ -11,9 +14,13 @@ def copy_html_files():
         os.makedirs(target_dir)
         print(f"Created directory: {target_dir}")
 
+    store = BlobStore(os.path.join(root_dir, ".blobs"))
+
     for dirpath, dirnames, filenames in os.walk(root_dir):
         if target_dir_name in dirnames: # not the "new" iteself
             dirnames.remove(target_dir_name)
+        if ".blobs" in dirnames:
+            dirnames.remove(".blobs")
 
         if "index.html" in filenames:
             rel_path = os.path.relpath(dirpath, root_dir)
@@ -36,10 +43,14 @@ def copy_html_files():
             dest_file = os.path.join(target_dir, new_filename)
 
             try:
-                shutil.copy2(source_file, dest_file)
+                store.copy(source_file, dest_file)
                 print(f"Copied: {rel_path}/index.html -> new/{new_filename}")
             except Exception as e:
                 print(f"Error copying {source_file}: {e}")
 
+    duplicates = store.duplicates()
+    store.close()
+    print(f"Shared blobs: {len(duplicates)} ({sum(n for _, n in duplicates)} files)")
+
 if __name__ == "__main__":
     copy_html_files()
@@ -0,0 +1,112 @@
+import os
+import csv
+import json
+from collections import Counter
+
+from url_frontier import SeenSet
+
+PAGES_SUFFIX = ".pages.ndjson"
+EDGES_SUFFIX = ".edges.tsv"
+
+class CrawlOutput:
+    """
+    Streaming crawl output: one compact JSON record per page in
+    <prefix>.pages.ndjson and one 'from<TAB>to<TAB>text' row per internal
+    link in <prefix>.edges.tsv. Every record is flushed as it is written,
+    so a crashed crawl still leaves everything crawled so far on disk.
+
+    In append mode (a resumed crawl) pages already in the file are not
+    written again, so a page re-crawled after a crash is never duplicated.
+    """
+    def __init__(self, prefix, append=False):
+        self.prefix = prefix
+        self.pages_path = prefix + PAGES_SUFFIX
+        self.edges_path = prefix + EDGES_SUFFIX
+        mode = 'a' if append else 'w'
+        self.written = SeenSet()
+        if append and os.path.exists(self.pages_path):
+            index = PageIndex(self.pages_path)
+            self.written.update(index)
+            index.close()
+        self._pages = open(self.pages_path, mode, encoding='utf-8')
+        self._edges_file = open(self.edges_path, mode, encoding='utf-8', newline='')
+        self._edges = csv.writer(self._edges_file, delimiter='\t', lineterminator='\n')
+        self.count = 0
+
+    def write_page(self, page_data):
+        if page_data['url'] in self.written:
+            return
+        self.written.add(page_data['url'])
+        self._pages.write(json.dumps(page_data, ensure_ascii=False, separators=(',', ':')))
+        self._pages.write('\n')
+        for link in page_data['internal_links']:
+            self._edges.writerow((page_data['url'], link['url'], link['text']))
+        self._pages.flush()
+        self._edges_file.flush()
+        self.count += 1
+
+    def close(self):
+        self._pages.close()
+        self._edges_file.close()
+
+def iter_pages(pages_path):
+    """Yields page records one at a time; a torn last line is ignored."""
+    with open(pages_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+def iter_edges(edges_path):
+    """Yields (from_url, to_url, text) tuples."""
+    with open(edges_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.reader(f, delimiter='\t'):
+            if len(row) == 3:
+                yield tuple(row)
+
+def incoming_counts(edges_path):
+    """Number of incoming internal links per URL, without loading any page."""
+    return Counter(to_url for _, to_url, _ in iter_edges(edges_path))
+
+class PageIndex:
+    """
+    Random access to a pages file by URL. Only byte offsets are held in
+    memory; a record is read and decoded when it is asked for.
+    """
+    def __init__(self, pages_path):
+        self.pages_path = pages_path
+        self.offsets = {}
+        with open(pages_path, 'rb') as f:
+            offset = 0
+            for line in f:
+                # Pull the url out without decoding the whole record
+                start = line.find(b'"url":"')
+                end = line.find(b'"', start + 7)
+                if start != -1 and b'\\' not in line[start:end]:
+                    self.offsets[line[start + 7:end].decode('utf-8')] = offset
+                elif line.strip():
+                    try:
+                        self.offsets[json.loads(line)['url']] = offset
+                    except ValueError:
+                        pass
+                offset += len(line)
+        self._file = open(pages_path, 'rb')
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, url):
+        return url in self.offsets
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def get(self, url):
+        if url not in self.offsets:
+            return None
+        self._file.seek(self.offsets[url])
+        return json.loads(self._file.readline())
+
+    def close(self):
+        self._file.close()
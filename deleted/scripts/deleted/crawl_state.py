@@ -0,0 +1,146 @@
+import json
+import time
+import sqlite3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL DEFAULT 0,
+    seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS visited (
+    url TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS http_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body BLOB,
+    fetched_at REAL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+class CrawlState:
+    """
+    On-disk crawl state: the frontier and visited set (checkpointed so an
+    interrupted crawl can resume), the extracted page data, and an HTTP
+    cache of bodies with their ETag / Last-Modified validators.
+
+    A finished crawl keeps its cache and pages; the next crawl starts a new
+    frontier but can send conditional requests for everything it has seen.
+    """
+    def __init__(self, path, checkpoint_every=20):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        # State files from before depth was stored get the columns added
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(frontier)")}
+        for column in ('depth', 'seq'):
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE frontier ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+        self._pending_writes = 0
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    # --- crawl lifecycle ---
+    def get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def is_resumable(self, base_url):
+        """True if an unfinished crawl of base_url left a frontier behind."""
+        return (self.get_meta('base_url') == base_url and
+                self.get_meta('complete') == '0' and
+                self.db.execute("SELECT 1 FROM frontier LIMIT 1").fetchone() is not None)
+
+    def start(self, base_url):
+        """Begins a new crawl; cached bodies and page data are kept."""
+        self.db.execute("DELETE FROM frontier")
+        self.db.execute("DELETE FROM visited")
+        self.set_meta('base_url', base_url)
+        self.set_meta('complete', '0')
+        self.set_meta('started_at', str(time.time()))
+        self.db.commit()
+
+    def finish(self):
+        self.set_meta('complete', '1')
+        self.db.commit()
+
+    # --- frontier / visited ---
+    def frontier(self):
+        """Queued (url, depth, seq) entries in discovery order."""
+        return list(self.db.execute("SELECT url, depth, seq FROM frontier ORDER BY seq"))
+
+    def visited(self):
+        return [row[0] for row in self.db.execute("SELECT url FROM visited")]
+
+    def enqueue(self, url, depth=0, seq=0):
+        self.db.execute("INSERT OR IGNORE INTO frontier (url, depth, seq) VALUES (?, ?, ?)",
+                        (url, depth, seq))
+
+    def mark_done(self, url):
+        self.db.execute("DELETE FROM frontier WHERE url = ?", (url,))
+        self.db.execute("INSERT OR IGNORE INTO visited (url) VALUES (?)", (url,))
+        self._pending_writes += 1
+        if self._pending_writes >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self.db.commit()
+        self._pending_writes = 0
+
+    # --- pages ---
+    def save_page(self, url, page_data):
+        self.db.execute("INSERT OR REPLACE INTO pages (url, data) VALUES (?, ?)",
+                        (url, json.dumps(page_data, ensure_ascii=False)))
+
+    def load_page(self, url):
+        row = self.db.execute("SELECT data FROM pages WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pages_for(self, urls):
+        """Page data for the given URLs, in the same order (missing ones skipped)."""
+        for url in urls:
+            page_data = self.load_page(url)
+            if page_data is not None:
+                yield url, page_data
+
+    # --- HTTP cache ---
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since for a cached URL (empty if unknown)."""
+        row = self.db.execute("SELECT etag, last_modified FROM http_cache WHERE url = ?",
+                              (url,)).fetchone()
+        headers = {}
+        if row:
+            if row[0]:
+                headers['If-None-Match'] = row[0]
+            if row[1]:
+                headers['If-Modified-Since'] = row[1]
+        return headers
+
+    def cached_body(self, url):
+        row = self.db.execute("SELECT body FROM http_cache WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def cached_response(self, url):
+        """(body, etag, last_modified) of a cached URL, or None."""
+        return self.db.execute("SELECT body, etag, last_modified FROM http_cache WHERE url = ?",
+                               (url,)).fetchone()
+
+    def store_response(self, url, body, etag=None, last_modified=None):
+        self.db.execute("INSERT OR REPLACE INTO http_cache (url, etag, last_modified, body, fetched_at) "
+                        "VALUES (?, ?, ?, ?, ?)", (url, etag, last_modified, body, time.time()))
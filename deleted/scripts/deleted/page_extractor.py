@@ -0,0 +1,206 @@
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+             'meta', 'param', 'source', 'track', 'wbr'}
+# Their contents are never part of a page's visible text
+HIDDEN_TAGS = {'script', 'style', 'template'}
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+
+# <link rel> values that make the browser fetch something, and what it is
+LINK_REL_KINDS = {'stylesheet': 'css', 'icon': 'image', 'apple-touch-icon': 'image',
+                  'modulepreload': 'js', 'preload': None, 'prefetch': None, 'manifest': 'other'}
+# Elements whose src is a subresource (img is handled with the page images)
+SRC_KINDS = {'script': 'js', 'iframe': 'document', 'embed': 'other',
+             'video': 'media', 'audio': 'media', 'source': 'media', 'track': 'media'}
+
+class PageExtractor(HTMLParser):
+    """
+    Single-pass, event-driven version of WebsiteCrawler.extract_content.
+
+    Title, meta description, headings (in document order), paragraphs,
+    images and links are collected while the page streams through the
+    parser; no tree is built. Text follows BeautifulSoup's
+    get_text(strip=True), and unclosed elements are closed the way its
+    html.parser builder does (by the next matching end tag of a parent).
+
+    Subresources (stylesheets, scripts, images, media, frames) are listed
+    in assets with whether they block rendering: stylesheets and
+    synchronous scripts seen before <body>.
+    """
+    def __init__(self, url):
+        super().__init__(convert_charrefs=True)
+        self.url = url
+        self.title = None
+        self.meta_description = ''
+        self.headings = []
+        self.paragraphs = []
+        self.images = []
+        self.links = []
+        self.assets = []
+        self._in_body = False
+        # Open elements as [tag, text pieces or None, result slot]; pieces
+        # only for the elements whose text we keep. Slots are reserved at
+        # the start tag so results stay in document order.
+        self._stack = []
+        self._capturing = 0
+        self._hidden = 0
+        self._in_title = False
+        self._title_parts = []
+        self._meta_seen = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and self.title is None:
+            self._in_title = True
+        elif tag == 'meta':
+            attrs = dict(attrs)
+            if attrs.get('name') == 'description' and not self._meta_seen:
+                self._meta_seen = True
+                if attrs.get('content'):
+                    self.meta_description = attrs['content'].strip()
+        elif tag == 'img':
+            attrs = dict(attrs)
+            src = attrs.get('src') or ''
+            if src:
+                self.images.append({
+                    'src': urljoin(self.url, src),
+                    'alt': attrs.get('alt') or ''
+                })
+                self._add_asset(src, 'image')
+        elif tag == 'body':
+            self._in_body = True
+        elif tag == 'link':
+            self._link_asset(dict(attrs))
+        elif tag in SRC_KINDS:
+            attrs = dict(attrs)
+            if attrs.get('src'):
+                blocking = (tag == 'script' and not self._in_body and attrs.get('type') != 'module'
+                            and 'async' not in attrs and 'defer' not in attrs)
+                self._add_asset(attrs['src'], SRC_KINDS[tag], blocking)
+            if tag == 'video' and attrs.get('poster'):
+                self._add_asset(attrs['poster'], 'image')
+
+        if tag in VOID_TAGS:
+            return
+
+        pieces = None
+        slot = None
+        if tag == 'p':
+            pieces, slot = [], len(self.paragraphs)
+            self.paragraphs.append(None)
+        elif tag in HEADING_TAGS:
+            pieces, slot = [], len(self.headings)
+            self.headings.append(None)
+        elif tag == 'a':
+            attrs = dict(attrs)
+            if 'href' in attrs:
+                pieces, slot = [], len(self.links)
+                self.links.append((attrs['href'] or '', ''))
+        if pieces is not None:
+            self._capturing += 1
+        if tag in HIDDEN_TAGS:
+            self._hidden += 1
+        self._stack.append([tag, pieces, slot])
+
+    def _add_asset(self, src, kind, blocking=False):
+        self.assets.append({'url': urljoin(self.url, src), 'kind': kind, 'blocking': blocking})
+
+    def _link_asset(self, attrs):
+        href = attrs.get('href')
+        rels = (attrs.get('rel') or '').lower().split()
+        for rel in rels:
+            if href and rel in LINK_REL_KINDS:
+                kind = LINK_REL_KINDS[rel] or {'style': 'css', 'script': 'js', 'font': 'font',
+                                               'image': 'image'}.get(attrs.get('as'), 'other')
+                blocking = (rel == 'stylesheet' and not self._in_body and 'alternate' not in rels
+                            and 'disabled' not in attrs and attrs.get('media', 'all') != 'print')
+                self._add_asset(href, kind, blocking)
+                return
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._finish_title()
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                break
+        else:
+            return
+        while len(self._stack) > i:
+            self._close(*self._stack.pop())
+
+    def _finish_title(self):
+        if self._in_title:
+            self._in_title = False
+            self.title = ''.join(self._title_parts)
+
+    def _close(self, tag, pieces, slot):
+        if tag in HIDDEN_TAGS:
+            self._hidden -= 1
+        if pieces is None:
+            return
+        self._capturing -= 1
+        text = ''.join(pieces)
+        if tag == 'a':
+            self.links[slot] = (self.links[slot][0], text)
+        elif text:
+            # Empty paragraphs/headings leave their None slot, dropped later
+            if tag == 'p':
+                self.paragraphs[slot] = text
+            else:
+                self.headings[slot] = {'level': int(tag[1]), 'text': text}
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+        if not self._capturing or self._hidden:
+            return
+        text = data.strip()
+        if not text:
+            return
+        for _, pieces, _ in self._stack:
+            if pieces is not None:
+                pieces.append(text)
+
+    def close(self):
+        super().close()
+        self._finish_title()
+        while self._stack:
+            self._close(*self._stack.pop())
+
+def extract_page(body, url, is_internal, normalize, with_assets=False):
+    """
+    Returns the same page_data dict as WebsiteCrawler.extract_content.
+    body may be bytes (decoded as UTF-8) or str; is_internal/normalize are
+    the crawler's is_valid_url/normalize_url. with_assets adds an 'assets'
+    list (see PageExtractor).
+    """
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', errors='replace')
+    parser = PageExtractor(url)
+    parser.feed(body)
+    parser.close()
+
+    page_data = {
+        'url': url,
+        'title': (parser.title or '').strip(),
+        'meta_description': parser.meta_description,
+        'headings': [h for h in parser.headings if h is not None],
+        'paragraphs': [p for p in parser.paragraphs if p is not None],
+        'images': parser.images,
+        'internal_links': [],
+        'external_links': []
+    }
+    for href, text in parser.links:
+        full_url = urljoin(url, href)
+        if is_internal(full_url):
+            page_data['internal_links'].append({'url': normalize(full_url), 'text': text})
+        else:
+            page_data['external_links'].append({'url': full_url, 'text': text})
+    if with_assets:
+        page_data['assets'] = parser.assets
+    return page_data
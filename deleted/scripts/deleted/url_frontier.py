@@ -0,0 +1,135 @@
+import heapq
+import hashlib
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Query parameters that never select different content
+TRACKING_PARAMS = {'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+                   'fbclid', 'gclid', 'replytocom', 'share', 'amp'}
+
+# WordPress serves the same page under these ids as under its pretty URL
+WORDPRESS_PARAMS = ('p', 'page_id', 'cat', 'tag', 's')
+
+def canonicalize_url(url, keep_params=(), drop_params=TRACKING_PARAMS):
+    """
+    Canonical form used for crawling and dedupe: fragment removed, scheme
+    and host lowercased, trailing slash stripped. Only query parameters in
+    keep_params survive (sorted); keep_params=None keeps every parameter
+    except drop_params. The default (keep none) matches the original
+    WebsiteCrawler.normalize_url.
+    """
+    parsed = urlparse(url)
+    query = ''
+    if parsed.query and keep_params != ():
+        params = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+                  if k not in drop_params and (keep_params is None or k in keep_params)]
+        query = urlencode(sorted(params))
+    canonical = urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), parsed.path, '', '', ''))
+    canonical = canonical.rstrip('/')
+    return f"{canonical}?{query}" if query else canonical
+
+class SeenSet:
+    """
+    Dedupe set storing a 64-bit hash per URL instead of the URL string.
+    Supports the parts of the set API the crawler uses (add, update, in,
+    len); collisions are possible but negligible at crawl sizes.
+    """
+    def __init__(self, urls=()):
+        self._hashes = set()
+        self.update(urls)
+
+    @staticmethod
+    def key(url):
+        return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def add(self, url):
+        self._hashes.add(self.key(url))
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url):
+        return self.key(url) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+class Frontier:
+    """
+    URL frontier ordered by (depth, discovery order): shallower pages come
+    first and ties keep the order links were found, so crawl order does not
+    depend on fetch timing. Each URL is admitted once.
+    """
+    def __init__(self, max_depth=None):
+        self.max_depth = max_depth
+        self.seen = SeenSet()
+        self._heap = []
+        self._seq = 0
+
+    def discover(self, url, depth=0, seq=None):
+        """
+        Registers url; returns its (depth, seq, url) entry, or None if already
+        seen. seq restores the position of an entry saved by an earlier run.
+        """
+        if url in self.seen:
+            return None
+        if self.max_depth is not None and depth > self.max_depth:
+            return None
+        self.seen.add(url)
+        self._seq = max(self._seq + 1, seq or 0)
+        return (depth, seq or self._seq, url)
+
+    def add(self, url, depth=0):
+        entry = self.discover(url, depth)
+        if entry:
+            heapq.heappush(self._heap, entry)
+        return entry is not None
+
+    def pop(self):
+        """Returns (url, depth) of the next URL to crawl."""
+        depth, _, url = heapq.heappop(self._heap)
+        return url, depth
+
+    def __len__(self):
+        return len(self._heap)
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+def parse_sitemap(xml_body):
+    """
+    Returns (page_urls, sitemap_urls) from a sitemap or sitemap index.
+    Invalid XML yields nothing.
+    """
+    pages, sitemaps = [], []
+    try:
+        root = ET.fromstring(xml_body)
+    except ET.ParseError:
+        return pages, sitemaps
+    target = sitemaps if _local(root.tag) == 'sitemapindex' else pages
+    for element in root.iter():
+        if _local(element.tag) == 'loc' and element.text:
+            target.append(element.text.strip())
+    return pages, sitemaps
+
+def parse_feed(xml_body):
+    """Entry URLs from an RSS or Atom feed."""
+    urls = []
+    try:
+        root = ET.fromstring(xml_body)
+    except ET.ParseError:
+        return urls
+    for element in root.iter():
+        if _local(element.tag) != 'link':
+            continue
+        if element.text and element.text.strip():
+            urls.append(element.text.strip())          # RSS <link>url</link>
+        elif element.get('href') and element.get('rel', 'alternate') == 'alternate':
+            urls.append(element.get('href'))           # Atom <link href=".."/>
+    return urls
+
+def robots_sitemaps(robots_txt):
+    """Sitemap URLs declared in robots.txt."""
+    return [line.split(':', 1)[1].strip() for line in robots_txt.splitlines()
+            if line.lower().startswith('sitemap:')]
@@ -1,11 +1,23 @@
 import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import json
 import time
 import sys
 from collections import defaultdict
 from datetime import datetime
+from page_extractor import extract_page
+from url_frontier import (Frontier, canonicalize_url, parse_sitemap, parse_feed,
+                          robots_sitemaps)
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Sitemap indexes can nest; stop following them after this many files
+MAX_SITEMAPS = 50
+
+# Response headers kept in a crawl archive (enough for conditional requests)
+ARCHIVED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
 
 class OutputLogger:
     """Custom logger that writes to both terminal and file"""
@@ -25,24 +37,35 @@ class OutputLogger:
         self.log.close()
 
 class WebsiteCrawler:
-    def __init__(self, base_url, delay=1):
+    def __init__(self, base_url, delay=1, output=None, keep_params=(), max_depth=None,
+                 archive=None, replay=None):
         self.base_url = base_url
         self.domain = urlparse(base_url).netloc
-        self.visited = set()
+        # Query parameters that select distinct pages (see canonicalize_url)
+        self.keep_params = keep_params
+        self.frontier = Frontier(max_depth=max_depth)
+        self.visited = self.frontier.seen
         self.pages_data = {}
         self.link_map = defaultdict(list)
         self.delay = delay
+        # Optional streaming writer (crawl_output.CrawlOutput); pages are then
+        # written as they are crawled instead of held in pages_data/link_map
+        self.output = output
+        # Optional crawl_archive.ArchiveWriter that every response is saved
+        # to, and ArchiveReader to replay responses from instead of the network
+        self.archive = archive
+        self.replay = replay
         
     def is_valid_url(self, url):
-        """Check if URL belongs to the same domain"""
+        """Check if URL belongs to the same domain (mailto:, tel: etc. never do)"""
         parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https', ''):
+            return False
         return parsed.netloc == self.domain or parsed.netloc == ''
     
     def normalize_url(self, url):
-        """Normalize URL by removing fragments and trailing slashes"""
-        parsed = urlparse(url)
-        normalized = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-        return normalized.rstrip('/')
+        """Normalize URL by removing fragments, trailing slashes and unkept query parameters"""
+        return canonicalize_url(url, self.keep_params)
     
     def extract_content(self, soup, url):
         """Extract meaningful content from the page"""
@@ -115,48 +138,136 @@ class WebsiteCrawler:
         
         return page_data
     
-    def crawl_page(self, url):
-        """Crawl a single page and extract its content"""
-        normalized_url = self.normalize_url(url)
-        
-        if normalized_url in self.visited:
+    def parse_page(self, body, url):
+        """Extract page content in a single streaming pass (see page_extractor)"""
+        return extract_page(body, url, self.is_valid_url, self.normalize_url)
+    
+    def store_page(self, url, page_data):
+        """Keep a crawled page: streamed to the output if set, else in memory"""
+        if self.output:
+            self.output.write_page(page_data)
             return
         
-        print(f"Crawling: {normalized_url}")
-        self.visited.add(normalized_url)
+        self.pages_data[url] = page_data
+        
+        # Build link map (which pages link to which)
+        for link in page_data['internal_links']:
+            target_url = link['url']
+            self.link_map[target_url].append({
+                'from': url,
+                'text': link['text']
+            })
+    
+    def crawl_page(self, url):
+        """Crawl a single page and extract its content; returns its page data or None"""
+        print(f"Crawling: {url}")
         
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(normalized_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            page_data = self.extract_content(soup, normalized_url)
-            
-            self.pages_data[normalized_url] = page_data
-            
-            # Build link map (which pages link to which)
-            for link in page_data['internal_links']:
-                target_url = link['url']
-                self.link_map[target_url].append({
-                    'from': normalized_url,
-                    'text': link['text']
-                })
+            if self.replay:
+                body = self.replayed_body(url)
+            else:
+                response = requests.get(url, headers=HEADERS, timeout=10)
+                response.raise_for_status()
+                body = response.content
+                self.archive_response(url, response.status_code, response.headers, body)
             
-            # Recursively crawl internal links
-            for link in page_data['internal_links']:
-                target_url = link['url']
-                if target_url not in self.visited:
-                    time.sleep(self.delay)  # Be polite
-                    self.crawl_page(target_url)
+            page_data = self.parse_page(body, url)
+            self.store_page(url, page_data)
+            return page_data
                     
         except Exception as e:
-            print(f"Error crawling {normalized_url}: {str(e)}")
+            print(f"Error crawling {url}: {str(e)}")
+            return None
+    
+    def archive_response(self, url, status, headers, body):
+        """Saves a response to the crawl archive, if one is being written"""
+        if self.archive:
+            kept = {name: headers[name] for name in ARCHIVED_HEADERS if name in headers}
+            self.archive.write_response(url, status, kept, body)
+    
+    def replayed_body(self, url):
+        """Body of an archived response; a URL missing from the archive is an error"""
+        record = self.replay.get(url)
+        if record is None:
+            raise LookupError(f"not in archive: {url}")
+        if record.status >= 400:
+            raise LookupError(f"archived response was {record.status}")
+        return record.body
+    
+    def collect_seeds(self, fetch):
+        """
+        Internal URLs listed in the site's sitemaps (robots.txt Sitemap lines
+        and /sitemap.xml, following sitemap indexes) and its /feed/.
+        fetch(url) returns the body as bytes, or None if unavailable.
+        """
+        root = self.base_url.rstrip('/') + '/'
+        robots = fetch(root + 'robots.txt')
+        sitemaps = robots_sitemaps(robots.decode('utf-8', errors='ignore')) if robots else []
+        sitemaps.append(root + 'sitemap.xml')
+        
+        seeds = []
+        fetched = set()
+        while sitemaps and len(fetched) < MAX_SITEMAPS:
+            sitemap_url = sitemaps.pop(0)
+            if sitemap_url in fetched:
+                continue
+            fetched.add(sitemap_url)
+            body = fetch(sitemap_url)
+            if body:
+                pages, nested = parse_sitemap(body)
+                seeds.extend(pages)
+                sitemaps.extend(nested)
+        
+        feed = fetch(root + 'feed/')
+        if feed:
+            seeds.extend(parse_feed(feed))
+        
+        return [self.normalize_url(url) for url in seeds if self.is_valid_url(url)]
+    
+    def fetch_seed(self, url):
+        """Blocking fetch used for seeding; None on any failure"""
+        try:
+            if self.replay:
+                return self.replayed_body(url)
+            response = requests.get(url, headers=HEADERS, timeout=10)
+            if not response.ok:
+                return None
+            self.archive_response(url, response.status_code, response.headers, response.content)
+            return response.content
+        except Exception:
+            return None
+    
+    def crawl(self, start_url=None, seed=False):
+        """
+        Crawl the site from start_url in frontier order (by depth, then
+        discovery), optionally seeded from sitemaps and feeds
+        """
+        self.frontier.add(self.normalize_url(start_url or self.base_url), 0)
+        if seed:
+            for url in self.collect_seeds(self.fetch_seed):
+                self.frontier.add(url, 1)
+        
+        first = True
+        while self.frontier:
+            url, depth = self.frontier.pop()
+            if not first and not self.replay:
+                time.sleep(self.delay)  # Be polite
+            first = False
+            
+            page_data = self.crawl_page(url)
+            if page_data:
+                for link in page_data['internal_links']:
+                    self.frontier.add(link['url'], depth + 1)
     
     def save_results(self, filename='website_migration_data.json'):
-        """Save crawled data to JSON file"""
+        """Save crawled data to JSON file (or close the streaming output)"""
+        if self.output:
+            self.output.close()
+            print(f"\nCrawling complete!")
+            print(f"Total pages crawled: {self.output.count}")
+            print(f"Data streamed to: {self.output.pages_path}, {self.output.edges_path}")
+            return
+        
         output = {
             'base_url': self.base_url,
             'total_pages': len(self.pages_data),
@@ -204,7 +315,7 @@ if __name__ == "__main__":
     print(f"Base URL: {base_url}\n")
     
     try:
-        crawler.crawl_page(base_url)
+        crawler.crawl(base_url, seed=True)
         
         # Save results
         json_file = f'aurelsystems_migration_data_{timestamp}.json'
@@ -0,0 +1,331 @@
+import os
+import re
+import json
+import argparse
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor
+
+import crawl_archive
+from migrate_content import file_sha1
+
+MANIFEST_NAME = ".convert_manifest.json"
+
+# Bump when the conversion rules change so every page is converted again
+CONVERTER_VERSION = 3
+
+CHUNK_SIZE = 65536
+
+SKIP_TAGS = {'script', 'style', 'noscript', 'form', 'button', 'iframe', 'svg', 'nav'}
+# WordPress chrome inside the body: post meta and the (mostly spam) comments
+SKIP_CLASSES = {'entry-meta', 'comments-area', 'comment-body', 'comment-respond'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+             'meta', 'source', 'track', 'wbr'}
+BLOCK_TAGS = {'p', 'div', 'section', 'table', 'tr', 'blockquote', 'figure', 'figcaption'}
+
+TITLE_SUFFIX_REGEX = re.compile(r'\s+[–—|-]\s+Aurel\b.*$', re.DOTALL)
+UPLOAD_DATE_REGEX = re.compile(r'/wp-content/uploads/(\d{4})/(\d{2})/')
+MD_ESCAPE_REGEX = re.compile(r'([\\`*_\[\]])')
+
+class CardParser(HTMLParser):
+    """
+    Incremental WordPress page to markdown converter. Only the article body
+    (div.entry-content, falling back to <article>) is kept; the page is fed
+    in chunks and never held as a tree.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ''
+        self.published = ''
+        self.upload_dates = []
+        self.out = []
+        self.found_body = False   # a feed, JSON or search page has no article body
+        self._in_title = False
+        self._body_tag = None     # tag that opened the captured body
+        self._body_depth = 0      # nesting of that tag inside the body
+        self._skip_tag = None     # tag that opened the skipped subtree
+        self._skip_depth = 0
+        self._pre = 0
+        self._lists = []
+        self._links = []
+        self._emphasis = []
+
+    # --- helpers ---
+    def _block(self):
+        self.out.append('\n\n')
+
+    def _capturing(self):
+        return self._body_tag is not None and self._skip_tag is None
+
+    # --- parser events ---
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        if tag == 'title':
+            self._in_title = True
+        elif tag == 'meta' and attrs.get('property') == 'article:published_time':
+            self.published = attrs.get('content') or ''
+        elif tag == 'time' and attrs.get('datetime') and not self.published:
+            self.published = attrs['datetime']
+
+        classes = set((attrs.get('class') or '').split())
+        if self._body_tag is None:
+            if (tag == 'div' and 'entry-content' in classes) or \
+               (tag == 'article' and not classes & SKIP_CLASSES):
+                self._body_tag = tag
+                self._body_depth = 1
+                self.found_body = True
+            return
+
+        if tag == self._body_tag:
+            self._body_depth += 1
+        for value in attrs.values():
+            if value:
+                self.upload_dates.extend(UPLOAD_DATE_REGEX.findall(value))
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in SKIP_TAGS or classes & SKIP_CLASSES or attrs.get('id') == 'comments':
+            self._skip_tag = tag
+            self._skip_depth = 1
+            return
+
+        if tag in BLOCK_TAGS:
+            self._block()
+        elif re.fullmatch(r'h[1-6]', tag):
+            # Cards own the only level 2 heading; body headings start at 3
+            level = min(int(tag[1]) + 1, 6)
+            self._block()
+            self.out.append('#' * max(level, 3) + ' ')
+        elif tag == 'br':
+            self.out.append('  \n')
+        elif tag in ('ul', 'ol'):
+            self._lists.append(tag)
+            if len(self._lists) == 1:
+                self._block()
+        elif tag == 'li':
+            indent = '  ' * (len(self._lists) - 1)
+            marker = '1.' if self._lists and self._lists[-1] == 'ol' else '-'
+            self.out.append(f"\n{indent}{marker} ")
+        elif tag in ('strong', 'b'):
+            self.out.append('**')
+        elif tag in ('em', 'i'):
+            # <i class="fa ..."> is an icon, not emphasis
+            self._emphasis.append(not attrs.get('class'))
+            if self._emphasis[-1]:
+                self.out.append('*')
+        elif tag == 'pre':
+            self._pre += 1
+            self.out.append('\n\n```\n')
+        elif tag == 'code' and not self._pre:
+            self.out.append('`')
+        elif tag == 'a':
+            self._links.append((len(self.out), attrs.get('href') or ''))
+        elif tag == 'img' and attrs.get('src'):
+            self.out.append(f"![{attrs.get('alt', '')}]({attrs['src']})")
+        elif tag in ('td', 'th'):
+            self.out.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        if self._body_tag is None:
+            return
+
+        if tag == self._body_tag:
+            self._body_depth -= 1
+            if self._body_depth == 0:
+                self._body_tag = None
+                self._block()
+                return
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+
+        if tag in BLOCK_TAGS or re.fullmatch(r'h[1-6]', tag):
+            self._block()
+        elif tag in ('ul', 'ol'):
+            if self._lists:
+                self._lists.pop()
+            if not self._lists:
+                self._block()
+        elif tag in ('strong', 'b'):
+            self.out.append('**')
+        elif tag in ('em', 'i') and self._emphasis:
+            if self._emphasis.pop():
+                self.out.append('*')
+        elif tag == 'pre':
+            self._pre = max(self._pre - 1, 0)
+            self.out.append('\n```\n\n')
+        elif tag == 'code' and not self._pre:
+            self.out.append('`')
+        elif tag == 'a' and self._links:
+            start, href = self._links.pop()
+            text = ''.join(self.out[start:]).strip()
+            if href and text and not href.startswith('mailto:'):
+                del self.out[start:]
+                self.out.append(f"[{text}]({href})")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        if not self._capturing():
+            return
+        if self._pre:
+            self.out.append(data)
+            return
+        text = re.sub(r'\s+', ' ', data)
+        if text.strip() or (self.out and not self.out[-1].endswith((' ', '\n'))):
+            self.out.append(MD_ESCAPE_REGEX.sub(r'\\\1', text))
+
+    def markdown(self):
+        body = ''.join(self.out)
+        body = re.sub(r'\*\*\s*\*\*|(?<!\*)\*\s*\*(?!\*)', '', body)
+        body = re.sub(r'[ \t]+\n', '\n', body)
+        body = re.sub(r'\n[ \t]+(?![-\d])', '\n', body)
+        body = re.sub(r'\n{3,}', '\n\n', body)
+        return body.strip()
+
+def card_date(parser, src_path, archive=None):
+    """
+    Best known date: published time, newest upload folder, then when the
+    source was last modified (migrate_content keeps the old/ mtime; an
+    archive has Last-Modified). Raises ValueError if none is known.
+    """
+    if parser.published[:10] and re.match(r'\d{4}-\d{2}-\d{2}$', parser.published[:10]):
+        return parser.published[:10]
+    if parser.upload_dates:
+        year, month = max(parser.upload_dates)
+        return f"{year}-{month}-01"
+    mtime = crawl_archive.source_mtime(src_path, archive)
+    if mtime is None:
+        # The fetch time would date a legacy page today and sort it first
+        raise ValueError("no known date (no published time and no Last-Modified)")
+    return datetime.fromtimestamp(mtime).strftime('%Y-%m-%d')
+
+def card_slug(src_path):
+    if src_path.startswith(crawl_archive.REPLAY_PREFIX):
+        stem = urlparse(src_path[len(crawl_archive.REPLAY_PREFIX):]).path
+    else:
+        stem = os.path.splitext(os.path.basename(src_path))[0]
+    return re.sub(r'[^a-z0-9]+', '-', stem.lower()).strip('-')
+
+def convert_page(src_path, out_dir, archive=None):
+    """
+    Streams one legacy page (file or "warc:<url>") into a dated markdown
+    card; returns the card name, or None for a source with no article body
+    (feeds and wp-json saved as .html, search pages, empty posts).
+    """
+    parser = CardParser()
+    with crawl_archive.open_source(src_path, archive) as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), ''):
+            parser.feed(chunk)
+    parser.close()
+
+    if not parser.found_body:
+        return None
+    title = TITLE_SUFFIX_REGEX.sub('', parser.title.strip()) or card_slug(src_path)
+    body = parser.markdown()
+    # The page heading usually repeats the title, which is already the card's ##
+    first, _, rest = body.partition('\n\n')
+    if first.lstrip('#').strip() == title:
+        body = rest
+    if not body.strip():
+        return None
+    card_name = f"{card_date(parser, src_path, archive)}-{card_slug(src_path)}.md"
+    with open(os.path.join(out_dir, card_name), 'w', encoding='utf-8') as f:
+        f.write(f"## {title}\n\n{body}\n".rstrip() + "\n")
+    return card_name
+
+def list_sources(src_dir, archive=None):
+    """(name, src_path, sha1) for every page, from src_dir or straight from an archive."""
+    if archive:
+        reader = crawl_archive.reader_for(archive)
+        return [(slug.replace('/', '_') + '.html', crawl_archive.REPLAY_PREFIX + url, reader.digest(url))
+                for url, slug in crawl_archive.page_slugs(reader) if slug]
+    return [(name, os.path.join(src_dir, name), file_sha1(os.path.join(src_dir, name)))
+            for name in sorted(os.listdir(src_dir)) if name.endswith('.html')]
+
+def convert_all(src_dir, out_dir, jobs=1, force=False, archive=None):
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = {'version': CONVERTER_VERSION, 'files': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    # Old entries are kept even when everything is converted again, so the
+    # cards they name can be replaced or removed
+    reconvert = force or manifest.get('version') != CONVERTER_VERSION
+    manifest['version'] = CONVERTER_VERSION
+
+    pending = []
+    skipped = 0
+    for name, src_path, src_hash in list_sources(src_dir, archive):
+        known = manifest['files'].get(name)
+        if not reconvert and known and known['sha1'] == src_hash and \
+           (known['card'] is None or os.path.exists(os.path.join(out_dir, known['card']))):
+            skipped += 1
+            continue
+        pending.append((name, src_path, src_hash))
+
+    print(f"Converting {len(pending)} pages ({skipped} unchanged, skipped).")
+    no_body = 0
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(convert_page, src_path, out_dir, archive) for _, src_path, _ in pending]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    results.append(e)
+    else:
+        results = []
+        for _, src_path, _ in pending:
+            try:
+                results.append(convert_page(src_path, out_dir, archive))
+            except Exception as e:
+                results.append(e)
+
+    for (name, src_path, src_hash), result in zip(pending, results):
+        if isinstance(result, Exception):
+            print(f"Error converting {src_path}: {result}")
+            continue
+        old = manifest['files'].get(name)
+        if old and old['card'] and old['card'] != result and \
+           os.path.exists(os.path.join(out_dir, old['card'])):
+            os.remove(os.path.join(out_dir, old['card']))
+        # A source without a body is remembered too, so it is not re-read next run
+        manifest['files'][name] = {'sha1': src_hash, 'card': result}
+        no_body += result is None
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    if no_body:
+        print(f"No article body, no card: {no_body} pages.")
+    print(f"Cards written to: {out_dir}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert migrated WordPress pages into markdown cards.")
+    parser.add_argument('--src', default=os.path.join("new", "html_old"), help="directory of legacy pages")
+    parser.add_argument('--content', default=os.path.join("new", "content"), help="content root to write into")
+    parser.add_argument('--section', default="Legacy", help="section (page) the cards belong to")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (1 = sequential)")
+    parser.add_argument('--force', action='store_true', help="convert every page again")
+    parser.add_argument('--archive', help="convert pages straight from this crawl archive instead of --src")
+    args = parser.parse_args()
+    convert_all(args.src, os.path.join(args.content, args.section), jobs=args.jobs, force=args.force,
+                archive=args.archive)
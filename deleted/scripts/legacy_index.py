@@ -0,0 +1,164 @@
+import os
+import re
+import sqlite3
+import argparse
+
+INDEX_NAME = "legacy_index.sqlite"
+NGINX_MAP_NAME = "legacy_redirects.map"
+REDIRECTS_NAME = "_redirects"
+
+# Where migrated pages are served from on the new site
+DEFAULT_TARGET_PREFIX = "/html_old/"
+
+# wget saved query-string pages as "index.html?p=1114" with '?' replaced by a space
+QUERY_FILE_REGEX = re.compile(r'^index\.html[ ?](?P<query>.+?)\.html$')
+CANONICAL_REGEX = re.compile(
+    r'<link[^>]+rel=["\']canonical["\'][^>]+href=["\']https?://www\.aurelsystems\.com/([^"\']*)["\']')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS slugs (
+    slug TEXT PRIMARY KEY,
+    new_name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    legacy_path TEXT PRIMARY KEY,
+    slug TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS links (
+    source TEXT NOT NULL,
+    path TEXT NOT NULL,
+    target TEXT
+);
+CREATE INDEX IF NOT EXISTS links_source ON links (source);
+CREATE INDEX IF NOT EXISTS links_target ON links (target);
+"""
+
+def connect(db_path):
+    """Opens (and creates if needed) the legacy URL index."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+def _add_alias(aliases, query, html):
+    canonical = CANONICAL_REGEX.search(html)
+    if canonical:
+        slug = canonical.group(1).rstrip('/')
+        aliases[f"?{query}"] = slug
+        aliases[f"index.html?{query}"] = slug
+
+def find_query_aliases(source_dir):
+    """Maps query-string page variants (e.g. '?p=1114') to their canonical slug."""
+    aliases = {}
+    for name in os.listdir(source_dir):
+        match = QUERY_FILE_REGEX.match(name)
+        if not match:
+            continue
+        with open(os.path.join(source_dir, name), 'r', encoding='utf-8', errors='ignore') as f:
+            _add_alias(aliases, match.group('query'), f.read())
+    return aliases
+
+def find_archive_aliases(reader, root_url):
+    """find_query_aliases for the root query variants stored in a crawl archive."""
+    aliases = {}
+    prefix = root_url.rstrip('/') + '?'
+    for url in reader.urls():
+        if url.startswith(prefix):
+            _add_alias(aliases, url[len(prefix):], reader.get(url).text())
+    return aliases
+
+def save_slug_map(conn, slug_map, aliases):
+    """Replaces the stored slug map and query aliases with the current scan."""
+    with conn:
+        conn.execute("DELETE FROM slugs")
+        conn.execute("DELETE FROM aliases")
+        conn.executemany("INSERT INTO slugs (slug, new_name) VALUES (?, ?)",
+                         sorted(slug_map.items()))
+        conn.executemany("INSERT INTO aliases (legacy_path, slug) VALUES (?, ?)",
+                         sorted(aliases.items()))
+        conn.execute("DELETE FROM links WHERE source NOT IN (SELECT new_name FROM slugs)")
+
+def load_slug_map(conn):
+    """Returns the stored slug map, with aliases resolved to their pages."""
+    slug_map = dict(conn.execute("SELECT slug, new_name FROM slugs"))
+    for legacy_path, new_name in conn.execute(
+            "SELECT a.legacy_path, s.new_name FROM aliases a JOIN slugs s ON s.slug = a.slug"):
+        slug_map[legacy_path] = new_name
+    return slug_map
+
+def save_links(conn, reports):
+    """Stores the links found in each rewritten page, replacing older rows."""
+    with conn:
+        for report in reports:
+            if 'error' in report:
+                continue
+            conn.execute("DELETE FROM links WHERE source = ?", (report['dest'],))
+            conn.executemany("INSERT INTO links (source, path, target) VALUES (?, ?, ?)",
+                             [(report['dest'], path, target) for path, target in report['links']])
+
+def backlinks(conn, new_name):
+    """Pages linking to the given migrated page."""
+    return [row[0] for row in conn.execute(
+        "SELECT DISTINCT source FROM links WHERE target = ? ORDER BY source", (new_name,))]
+
+def unresolved_links(conn):
+    """Legacy paths still pointing at the old domain, with how often they occur."""
+    return list(conn.execute(
+        "SELECT path, COUNT(*) FROM links WHERE target IS NULL "
+        "GROUP BY path ORDER BY COUNT(*) DESC, path"))
+
+def redirect_pairs(conn, target_prefix=DEFAULT_TARGET_PREFIX):
+    """Yields (legacy request URI, new URL) for every known legacy page."""
+    for slug, new_name in conn.execute("SELECT slug, new_name FROM slugs ORDER BY slug"):
+        if slug == "":
+            continue
+        target = target_prefix + new_name
+        yield f"/{slug}/", target
+        yield f"/{slug}", target
+    for legacy_path, new_name in conn.execute(
+            "SELECT a.legacy_path, s.new_name FROM aliases a "
+            "JOIN slugs s ON s.slug = a.slug ORDER BY a.legacy_path"):
+        yield f"/{legacy_path}", target_prefix + new_name
+
+def write_nginx_map(conn, path, target_prefix=DEFAULT_TARGET_PREFIX):
+    """
+    Writes an nginx 'map' keyed on $request_uri (query string included).
+    Use with: if ($legacy_redirect) { return 301 $legacy_redirect; }
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("map $request_uri $legacy_redirect {\n")
+        f.write('    default "";\n')
+        for source, target in redirect_pairs(conn, target_prefix):
+            f.write(f'    "{source}" "{target}";\n')
+        f.write("}\n")
+
+def write_redirects_file(conn, path, target_prefix=DEFAULT_TARGET_PREFIX):
+    """Writes a Netlify/Cloudflare style '_redirects' file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for source, target in redirect_pairs(conn, target_prefix):
+            if '?' in source:
+                # Query strings are matched as separate 'key=value' columns
+                source_path, query = source.split('?', 1)
+                f.write(f"{source_path} {query.replace('&', ' ')} {target} 301\n")
+            else:
+                f.write(f"{source} {target} 301\n")
+
+def write_redirect_maps(conn, out_dir, target_prefix=DEFAULT_TARGET_PREFIX):
+    write_nginx_map(conn, os.path.join(out_dir, NGINX_MAP_NAME), target_prefix)
+    write_redirects_file(conn, os.path.join(out_dir, REDIRECTS_NAME), target_prefix)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the legacy URL index and regenerate redirect maps.")
+    parser.add_argument('--db', default=INDEX_NAME, help="path to the index database")
+    parser.add_argument('--out', default="new", help="directory for the redirect maps")
+    parser.add_argument('--prefix', default=DEFAULT_TARGET_PREFIX, help="URL prefix of migrated pages")
+    parser.add_argument('--unresolved', action='store_true', help="list unresolved legacy links")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.unresolved:
+        for path, count in unresolved_links(conn):
+            print(f"{count:4d}  {path}")
+    else:
+        write_redirect_maps(conn, args.out, args.prefix)
+        print(f"Redirect maps written to: {args.out}")
+    conn.close()
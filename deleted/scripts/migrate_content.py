@@ -1,68 +1,222 @@
 import os
 import shutil
 import re
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import legacy_index
+import crawl_archive
+from blob_store import BlobStore
 
-def migrate_content():
-    base_dir = os.getcwd() 
+domain_regex = re.compile(r'https?://www\.aurelsystems\.com/([^"\']*)')
+
+MANIFEST_NAME = ".migrate_manifest.json"
+REPORT_NAME = "migration_report.json"
+
+# Bump when rewritten output changes for the same input (2: copies keep the source mtime)
+REWRITE_VERSION = 2
+
+# slug_map (and archive path) handed to each pool worker once, instead of once per file
+_worker_slug_map = None
+_worker_archive = None
+
+def _init_worker(slug_map, archive=None):
+    global _worker_slug_map, _worker_archive
+    _worker_slug_map = slug_map
+    _worker_archive = archive
+
+def file_sha1(path):
+    """Hashes a file in chunks so large pages are never held in memory twice."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def slug_map_version(slug_map):
+    """Stable hash of the slug map and rewrite rule; changes force a re-run."""
+    payload = json.dumps([REWRITE_VERSION, domain_regex.pattern, sorted(slug_map.items())])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def rewrite_file(src_path, dest_path, slug_map=None, archive=None):
+    """Streams one page (a file or "warc:<url>" source) through the link rewriter."""
+    if slug_map is None:
+        slug_map = _worker_slug_map
+        archive = _worker_archive
+    report = {'source': src_path, 'dest': os.path.basename(dest_path),
+              'rewritten': 0, 'unresolved': [], 'links': []}
+
+    def replace_link(match):
+        path = match.group(1)
+
+        clean_path = path.rstrip('/')
+
+        if clean_path in slug_map:
+            report['rewritten'] += 1
+            report['links'].append((clean_path, slug_map[clean_path]))
+            return slug_map[clean_path]
+
+        if clean_path == "":
+            report['rewritten'] += 1
+            return "../index.html"
+
+        report['unresolved'].append(match.group(0))
+        report['links'].append((clean_path, None))
+        return match.group(0)
+
+    tmp_path = dest_path + ".tmp"
+    try:
+        with crawl_archive.open_source(src_path, archive) as src, \
+             open(tmp_path, 'w', encoding='utf-8') as dest:
+            for line in src:
+                dest.write(domain_regex.sub(replace_link, line))
+        os.replace(tmp_path, dest_path)
+        # The copy keeps the original's date; html_to_cards dates undated pages by it
+        mtime = crawl_archive.source_mtime(src_path, archive)
+        if mtime is not None:
+            os.utime(dest_path, (mtime, mtime))
+    except Exception as e:
+        report['error'] = str(e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return report
+
+def load_manifest(dest_dir):
+    path = os.path.join(dest_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError:
+            pass
+    return {'slug_map_version': None, 'files': {}, 'reports': {}}
+
+def save_manifest(dest_dir, manifest):
+    with open(os.path.join(dest_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def migrate_content(jobs=1, force=False, archive=None):
+    base_dir = os.getcwd()
     source_dir = os.path.join(base_dir, "old")
     dest_dir = os.path.join(base_dir, "new", "html_old")
-    
+
     if not os.path.exists(dest_dir):
         os.makedirs(dest_dir)
 
     slug_map = {}
-    
-    slug_map[""] = "index.html" 
-    
+
+    slug_map[""] = "index.html"
+
     files_to_process = []
 
-    print("Scanning directories...")
-    for dirpath, dirnames, filenames in os.walk(source_dir):
-        if "index.html" in filenames:
-            rel_path = os.path.relpath(dirpath, source_dir)
-            
-            if rel_path == ".":
+    reader = crawl_archive.reader_for(archive) if archive else None
+    if reader:
+        print(f"Replaying pages from {archive}...")
+        for url, slug in crawl_archive.page_slugs(reader):
+            if slug == "":
                 continue
-
-            slug = rel_path.replace(os.path.sep, "/")
-            new_name = rel_path.replace(os.path.sep, "_") + ".html"
-            
+            new_name = slug.replace("/", "_") + ".html"
             slug_map[slug] = new_name
-            files_to_process.append((os.path.join(dirpath, "index.html"), new_name))
+            files_to_process.append((crawl_archive.REPLAY_PREFIX + url, new_name))
+    else:
+        print("Scanning directories...")
+        for dirpath, dirnames, filenames in os.walk(source_dir):
+            if "index.html" in filenames:
+                rel_path = os.path.relpath(dirpath, source_dir)
+
+                if rel_path == ".":
+                    continue
+
+                slug = rel_path.replace(os.path.sep, "/")
+                new_name = rel_path.replace(os.path.sep, "_") + ".html"
+
+                slug_map[slug] = new_name
+                files_to_process.append((os.path.join(dirpath, "index.html"), new_name))
 
     print(f"Found {len(files_to_process)} files to process.")
 
-    domain_regex = re.compile(r'https?://www\.aurelsystems\.com/([^"\']*)')
+    # Query-string variants (?p=1114) resolve through their canonical page
+    if reader:
+        found = legacy_index.find_archive_aliases(reader, crawl_archive.DEFAULT_BASE_URL)
+    else:
+        found = legacy_index.find_query_aliases(source_dir)
+    aliases = {alias: slug for alias, slug in found.items() if slug in slug_map}
+    index = legacy_index.connect(os.path.join(base_dir, legacy_index.INDEX_NAME))
+    legacy_index.save_slug_map(index, slug_map, aliases)
+    slug_map = legacy_index.load_slug_map(index)
 
+    # Skip files whose source and slug map are both unchanged since last run;
+    # their last report is kept in the manifest for the full report below
+    manifest = load_manifest(dest_dir)
+    version = slug_map_version(slug_map)
+    if force or manifest['slug_map_version'] != version:
+        manifest = {'slug_map_version': version, 'files': {}, 'reports': {}}
+    manifest.setdefault('reports', {})
+
+    pending = []
+    skipped = 0
     for src_path, new_name in files_to_process:
+        if reader:
+            src_hash = reader.digest(src_path[len(crawl_archive.REPLAY_PREFIX):])
+        else:
+            src_hash = file_sha1(src_path)
         dest_path = os.path.join(dest_dir, new_name)
-        
-        try:
-            with open(src_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            def replace_link(match):
-                path = match.group(1)
-
-                clean_path = path.rstrip('/')
-                
-                if clean_path in slug_map:
-                    return slug_map[clean_path]
-                
-                if clean_path == "":
-                    return "../index.html"  
-                
-                return match.group(0) 
-
-            new_content = domain_regex.sub(replace_link, content)
-            
-            with open(dest_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-                
-        except Exception as e:
-            print(f"Error processing {src_path}: {e}")
+        if manifest['files'].get(new_name) == src_hash and new_name in manifest['reports'] \
+           and os.path.exists(dest_path):
+            skipped += 1
+            continue
+        pending.append((src_path, dest_path, new_name, src_hash))
+
+    print(f"Rewriting {len(pending)} files ({skipped} unchanged, skipped).")
+
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(slug_map, archive)) as pool:
+            reports = list(pool.map(rewrite_file,
+                                    [p[0] for p in pending],
+                                    [p[1] for p in pending],
+                                    chunksize=8))
+    else:
+        reports = [rewrite_file(src_path, dest_path, slug_map, archive)
+                   for src_path, dest_path, _, _ in pending]
+
+    # Identical rewritten pages end up as links to a single stored blob
+    store = BlobStore(os.path.join(base_dir, ".blobs"))
+    for (src_path, dest_path, new_name, src_hash), report in zip(pending, reports):
+        if 'error' in report:
+            print(f"Error processing {src_path}: {report['error']}")
+            manifest['files'].pop(new_name, None)
+            manifest['reports'].pop(new_name, None)
+        else:
+            store.ingest(dest_path)
+            manifest['files'][new_name] = src_hash
+            manifest['reports'][new_name] = report
+    store.close()
+
+    save_manifest(dest_dir, manifest)
+
+    legacy_index.save_links(index, reports)
+    legacy_index.write_redirect_maps(index, os.path.join(base_dir, "new"))
+    unresolved = legacy_index.unresolved_links(index)
+    index.close()
+    print(f"Legacy index updated ({len(unresolved)} unresolved legacy paths).")
+
+    report_path = os.path.join(base_dir, REPORT_NAME)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({'slug_map_version': version, 'skipped': skipped,
+                   'files': [manifest['reports'][name] for name in sorted(manifest['reports'])]
+                            + [r for r in reports if 'error' in r]}, f, indent=2)
+    print(f"Rewrite report saved to: {report_path}")
 
     print("Migration complete.")
 
 if __name__ == "__main__":
-    migrate_content()
+    parser = argparse.ArgumentParser(description="Rewrite legacy links in old/ into new/html_old/.")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (1 = sequential)")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore the manifest and rewrite every file")
+    parser.add_argument('--archive', help="replay pages from this crawl archive instead of old/")
+    args = parser.parse_args()
+    migrate_content(jobs=args.jobs, force=args.force, archive=args.archive)
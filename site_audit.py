@@ -0,0 +1,237 @@
+import os
+import re
+import sys
+import json
+import argparse
+from urllib.parse import urljoin, urlparse, unquote
+
+import requests
+
+# The crawler and its single-pass extractor live with the migration scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deleted', 'scripts', 'deleted'))
+from website_crawler import WebsiteCrawler, HEADERS
+from page_extractor import extract_page
+
+# --- Configuration ---
+ROOT_DIR = '.'
+LIVE_DIR = os.path.join(ROOT_DIR, 'live')
+BUDGETS_FILE = os.path.join(ROOT_DIR, 'budgets')
+
+# Pages audited from disk get this origin, so the crawler's link handling applies unchanged
+DISK_BASE_URL = 'http://live.local/'
+
+ASSET_TYPES = ('document', 'css', 'js', 'image', 'font', 'media', 'other')
+EXTENSION_TYPES = {
+    '.html': 'document', '.htm': 'document',
+    '.css': 'css',
+    '.js': 'js', '.mjs': 'js',
+    '.png': 'image', '.jpg': 'image', '.jpeg': 'image', '.gif': 'image', '.svg': 'image',
+    '.webp': 'image', '.avif': 'image', '.ico': 'image',
+    '.woff': 'font', '.woff2': 'font', '.ttf': 'font', '.otf': 'font', '.eot': 'font',
+    '.mp4': 'media', '.webm': 'media', '.mp3': 'media', '.ogg': 'media', '.vtt': 'media',
+}
+
+# url(...) and @import references inside a stylesheet
+CSS_REF_REGEX = re.compile(r'''url\(\s*['"]?([^'")]+?)['"]?\s*\)|@import\s+['"]([^'"]+)['"]''')
+
+def load_budgets(path):
+    """Reads 'name: value' budget lines (same format as the content 'config' files)."""
+    budgets = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if ':' in line and not line.lstrip().startswith('#'):
+                    key, val = line.strip().split(':', 1)
+                    budgets[key.strip()] = float(val)
+    return budgets
+
+def asset_type(url, kind):
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    return EXTENSION_TYPES.get(ext, kind if kind in ASSET_TYPES else 'other')
+
+class SiteAuditor(WebsiteCrawler):
+    """
+    Page-weight audit of the built site. Pages are found the way the
+    crawler finds them (internal links, plus every .html file when
+    auditing live/ on disk), and each page's subresources, including the
+    fonts and images its stylesheets pull in, are fetched once and sized.
+    """
+    def __init__(self, base_url, root_dir=None, budgets=None, fetch_external=False):
+        super().__init__(base_url, delay=0)
+        self.root_dir = root_dir
+        self.budgets = budgets or {}
+        self.fetch_external = fetch_external
+        self.sizes = {}       # asset url -> bytes, None if missing or not fetched
+        self.css_refs = {}    # stylesheet url -> urls it references
+        self.reports = []
+
+    def local_path(self, url):
+        path = unquote(urlparse(url).path).lstrip('/')
+        if not path or path.endswith('/'):
+            path += 'index.html'
+        return os.path.join(self.root_dir, path)
+
+    def fetch_bytes(self, url):
+        """Body of url, from disk or over HTTP; None if it cannot be had"""
+        if self.root_dir and self.is_valid_url(url):
+            path = self.local_path(url)
+            if not os.path.isfile(path):
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+        try:
+            response = requests.get(url, headers=HEADERS, timeout=10)
+            return response.content if response.ok else None
+        except Exception:
+            return None
+
+    def collect_seeds(self, fetch):
+        """On disk every built page is a seed, linked or not"""
+        if not self.root_dir:
+            return super().collect_seeds(fetch)
+        return [urljoin(self.base_url, name) for name in sorted(os.listdir(self.root_dir))
+                if name.endswith('.html')]
+
+    def crawl_page(self, url):
+        """Audit one page; returns its page data so the crawl follows its links"""
+        if asset_type(url, 'document') != 'document':
+            return None
+        body = self.fetch_bytes(url)
+        if body is None:
+            print(f"Error auditing {url}: not found")
+            return None
+        page_data = extract_page(body, url, self.is_valid_url, self.normalize_url, with_assets=True)
+        self.reports.append(self.audit_page(url, len(body), page_data['assets']))
+        return page_data
+
+    def is_third_party(self, url):
+        return not self.is_valid_url(url)
+
+    def asset_size(self, url):
+        if url not in self.sizes:
+            body = None
+            if self.fetch_external or not self.is_third_party(url):
+                body = self.fetch_bytes(url)
+            self.sizes[url] = len(body) if body is not None else None
+            if body is not None and asset_type(url, 'css') == 'css':
+                text = body.decode('utf-8', errors='ignore')
+                self.css_refs[url] = [urljoin(url, a or b) for a, b in CSS_REF_REGEX.findall(text)
+                                      if not (a or b).startswith('data:')]
+        return self.sizes[url]
+
+    def audit_page(self, url, page_bytes, assets):
+        report = {
+            'url': url,
+            'bytes': page_bytes,
+            'requests': 1,
+            'by_type': {'document': page_bytes},
+            'render_blocking': [],
+            'third_party': [],
+            'missing': [],
+            'unmeasured': 0,
+        }
+        pending = [(a['url'], a['kind'], a['blocking']) for a in assets]
+        seen = {url}
+        while pending:
+            asset_url, kind, blocking = pending.pop(0)
+            if asset_url in seen or asset_url.startswith('data:'):
+                continue
+            seen.add(asset_url)
+            kind = asset_type(asset_url, kind)
+            size = self.asset_size(asset_url)
+            report['requests'] += 1
+            if blocking:
+                report['render_blocking'].append(asset_url)
+            if self.is_third_party(asset_url):
+                origin = '{0.scheme}://{0.netloc}'.format(urlparse(asset_url))
+                if origin not in report['third_party']:
+                    report['third_party'].append(origin)
+            if size is None:
+                if self.is_third_party(asset_url) and not self.fetch_external:
+                    report['unmeasured'] += 1
+                else:
+                    report['missing'].append(asset_url)
+                continue
+            report['bytes'] += size
+            report['by_type'][kind] = report['by_type'].get(kind, 0) + size
+            # Whatever a stylesheet references is requested by the page too
+            pending.extend((ref, 'other', False) for ref in self.css_refs.get(asset_url, ()))
+
+        report['violations'] = self.check_budgets(report)
+        return report
+
+    def check_budgets(self, report):
+        measured = {
+            'total_kb': report['bytes'] / 1024,
+            'requests': report['requests'],
+            'render_blocking': len(report['render_blocking']),
+            'third_party_origins': len(report['third_party']),
+        }
+        for kind in ASSET_TYPES:
+            measured[f'{kind}_kb'] = report['by_type'].get(kind, 0) / 1024
+        violations = []
+        for name, limit in self.budgets.items():
+            if name not in measured:
+                continue
+            if measured[name] > limit:
+                violations.append(f"{name} {round(measured[name], 1):g} > {limit:g}")
+        return violations
+
+    def audit(self):
+        """Audits every page; returns the number over budget"""
+        start = None
+        if self.root_dir and not os.path.isfile(os.path.join(self.root_dir, 'index.html')):
+            seeds = self.collect_seeds(None)
+            start = seeds[0] if seeds else None
+            if start is None:
+                print(f"No pages found in {self.root_dir}")
+                return 0
+        self.crawl(start, seed=True)
+        self.reports.sort(key=lambda r: r['url'])
+        return sum(1 for r in self.reports if r['violations'])
+
+    def print_report(self):
+        def page_name(url):
+            return urlparse(url).path.lstrip('/') or '/'
+
+        print(f"\n{'Page':<40} {'KB':>8} {'Req':>5} {'Block':>6} {'3rd':>4}")
+        for r in self.reports:
+            name = page_name(r['url'])
+            status = 'OVER' if r['violations'] else 'ok'
+            print(f"{name[:40]:<40} {r['bytes'] / 1024:>8.1f} {r['requests']:>5} "
+                  f"{len(r['render_blocking']):>6} {len(r['third_party']):>4}  {status}")
+        for r in self.reports:
+            name = page_name(r['url'])
+            for origin in r['third_party']:
+                print(f"  {name}: third-party origin {origin}")
+            for url in r['missing']:
+                print(f"  {name}: missing {url}")
+            for violation in r['violations']:
+                print(f"  {name}: over budget, {violation}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check page weight and request counts against budgets.")
+    parser.add_argument('root', nargs='?', default=LIVE_DIR, help="built site directory")
+    parser.add_argument('--url', help="audit a running server (e.g. http://127.0.0.1:8000/) instead")
+    parser.add_argument('--budgets', default=BUDGETS_FILE, help="budget file ('name: value' lines)")
+    parser.add_argument('--external', action='store_true', help="download third-party assets to size them")
+    parser.add_argument('--json', metavar='PATH', help="also write the per-page report as JSON")
+    args = parser.parse_args()
+
+    if not args.url and not os.path.isdir(args.root):
+        sys.exit(f"Nothing to audit: {args.root} is not a directory (did the build run?)")
+
+    if args.url:
+        auditor = SiteAuditor(args.url, budgets=load_budgets(args.budgets), fetch_external=args.external)
+    else:
+        auditor = SiteAuditor(DISK_BASE_URL, root_dir=args.root, budgets=load_budgets(args.budgets),
+                              fetch_external=args.external)
+    over = auditor.audit()
+    auditor.print_report()
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(auditor.reports, f, indent=2)
+
+    print(f"\n{len(auditor.reports)} pages audited, {over} over budget.")
+    # An empty site is a broken build, not a passing one
+    sys.exit(1 if over or not auditor.reports else 0)
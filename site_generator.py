@@ -2,8 +2,12 @@ import os
 import shutil
 import re
 import sys
-import markdown
-import sass  # Requires: pip install libsass
+import json
+import time
+import hashlib
+from datetime import datetime
+# markdown, sass (pip install libsass) and pygments are imported where they
+# are used, so a build with nothing stale never pays for loading them
 
 # --- Configuration ---
 ROOT_DIR = '.'
@@ -15,27 +19,51 @@ LIVE_DIR = os.path.join(ROOT_DIR, 'live')
 SCSS_FILE = os.path.join(STYLES_DIR, 'main.scss')
 CSS_OUTPUT_DIR = os.path.join(LIVE_DIR, 'css')
 CSS_OUTPUT_FILE = os.path.join(CSS_OUTPUT_DIR, 'style.css')
+HIGHLIGHT_CSS_FILE = os.path.join(CSS_OUTPUT_DIR, 'highlight.css')
+
+# Build-time caches (safe to delete, rebuilt on demand)
+CACHE_DIR = os.path.join(ROOT_DIR, '.cache')
+HIGHLIGHT_CACHE_DIR = os.path.join(CACHE_DIR, 'highlight')
+HIGHLIGHT_STYLE = 'default'
+
+# Content tree, parsed configs, render-cache index and asset manifest of the
+# last build; lets a no-op build finish without listing or parsing anything
+SNAPSHOT_FILE = os.path.join(CACHE_DIR, 'build_snapshot.json')
+SNAPSHOT_VERSION = 1
 
 # Regex for parsing date-filename.md (e.g. 2026-01-01-MyPost.md)
 DATE_FILE_REGEX = re.compile(r'^(\d{4}-\d{2}-\d{2})-(.+)\.md$')
 
+# Regex for fenced code blocks (```lang ... ``` or ~~~lang ... ~~~), also
+# indented inside list items or behind blockquote '>' markers
+FENCED_CODE_REGEX = re.compile(
+    r'^(?P<prefix>[ \t]*(?:>[ \t]?)*)(?P<fence>`{3,}|~{3,})[ \t]*(?P<lang>[\w+#.-]*)[^\n]*\n'
+    r'(?P<code>.*?)\n?^(?P=prefix)(?P=fence)[ \t]*$',
+    re.MULTILINE | re.DOTALL)
+
+# Highlighted blocks already seen during this run, keyed by block hash
+_highlight_memo = {}
+
 def ensure_dir(path):
     if not os.path.exists(path):
         os.makedirs(path)
 
 def compile_sass():
-    """Compiles main.scss to style.css"""
+    """Compiles main.scss to style.css; returns True on success"""
     print(f"Compiling SASS: {SCSS_FILE} -> {CSS_OUTPUT_FILE}")
     ensure_dir(CSS_OUTPUT_DIR)
     
     try:
+        import sass  # Requires: pip install libsass
         css_content = sass.compile(filename=SCSS_FILE)
         with open(CSS_OUTPUT_FILE, 'w', encoding='utf-8') as f:
             f.write(css_content)
         print("SASS compilation successful.")
+        return True
     except Exception as e:
         print(f"Error compiling SASS: {e}")
         # Continue execution even if SASS fails (might verify logic without style)
+        return False
 
 def clean_and_prepare_live():
     """Cleans /live/ directory but keeps the root folder."""
@@ -68,16 +96,73 @@ def generate_navbar_html(active_tab, nav_items):
     nav_html += '</ul></nav>'
     return nav_html
 
+def write_highlight_css():
+    """Writes the shared highlight stylesheet used by every page with code."""
+    from pygments.formatters import HtmlFormatter
+    ensure_dir(CSS_OUTPUT_DIR)
+    css = HtmlFormatter(style=HIGHLIGHT_STYLE).get_style_defs('.highlight')
+    with open(HIGHLIGHT_CSS_FILE, 'w', encoding='utf-8') as f:
+        f.write(css)
+
+def highlight_code_block(lang, code):
+    """Returns highlighted HTML for a code block, cached by content hash."""
+    key = f"{HIGHLIGHT_STYLE}\0{lang}\0{code}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    if digest in _highlight_memo:
+        return _highlight_memo[digest]
+
+    cache_path = os.path.join(HIGHLIGHT_CACHE_DIR, f"{digest}.html")
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+    else:
+        from pygments import highlight
+        from pygments.formatters import HtmlFormatter
+        from pygments.lexers import get_lexer_by_name, TextLexer
+        from pygments.util import ClassNotFound
+        try:
+            lexer = get_lexer_by_name(lang) if lang else TextLexer()
+        except ClassNotFound:
+            lexer = TextLexer()
+        html = highlight(code, lexer, HtmlFormatter(style=HIGHLIGHT_STYLE))
+        ensure_dir(HIGHLIGHT_CACHE_DIR)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+    _highlight_memo[digest] = html
+    return html
+
 def parse_md_file(filepath):
-    """Reads an MD file and returns metadata and content."""
+    """Reads an MD file and returns its HTML and whether it contains code."""
+    import markdown
     with open(filepath, 'r', encoding='utf-8') as f:
         text = f.read()
     
-    # Simple parsing: separate metadata headers if any
-    # Assuming standard markdown for now, or the format used in previous steps
-    # Just return raw html conversion for simplicity unless frontmatter parser is needed
+    # Fenced code is highlighted up front and swapped in after markdown runs,
+    # so markdown never gets a chance to re-escape the highlighted HTML.
+    # A nested block keeps its prefix so the token lands in the same list
+    # item or blockquote; the prefix is stripped from the code itself.
+    blocks = {}
+    def stash_block(match):
+        token = f"HLBLOCK{len(blocks)}X{id(blocks)}"
+        prefix = match.group('prefix')
+        code = match.group('code')
+        if prefix:
+            code = '\n'.join(line[len(prefix):] if line.startswith(prefix) else line.lstrip(' \t>')
+                             for line in code.split('\n'))
+        blocks[token] = highlight_code_block(match.group('lang').lower(), code)
+        blank = prefix.rstrip()
+        if not blank:
+            # python-markdown continues a list item only at four-space steps
+            prefix = ' ' * (-(-len(prefix.expandtabs(4)) // 4) * 4)
+        return f"{blank}\n{prefix}{token}\n{blank}"
+
+    text = FENCED_CODE_REGEX.sub(stash_block, text)
     html = markdown.markdown(text)
-    return html
+    for token, block_html in blocks.items():
+        # Tight list items hold the token without a paragraph around it
+        html = html.replace(f"<p>{token}</p>", block_html).replace(token, block_html)
+    return html, bool(blocks)
 
 def parse_config(dir_path):
     """Reads 'config' file in directory to determine theme/layout."""
@@ -91,86 +176,86 @@ def parse_config(dir_path):
                     config[key.strip()] = val.strip()
     return config
 
-def generate_html_pages(nav_items):
-    """Walks through content directory and generates HTML pages."""
+def list_md_files(section_path):
+    """Markdown files of a section, sorted by name (date)."""
+    md_files = []
+    for f in os.listdir(section_path):
+        if DATE_FILE_REGEX.match(f):
+            md_files.append(f)
+        # handle non-dated MD files? e.g. Introduction.md
+        elif f.endswith('.md') and f not in ['header.md', 'footer.md']:
+             md_files.append(f)
+
+    md_files.sort() # sort by name (date)
+    return md_files
+
+def generate_section_page(item, nav_items, config, md_files):
+    """Generates one section page ("Tab" -> "Page.html") from its markdown files."""
+    output_filename = f"{item}.html"
+    output_path = os.path.join(LIVE_DIR, output_filename)
     
-    # We treat top-level folders as "Tabs" -> "Page.html"
-    for item in nav_items:
-        section_path = os.path.join(CONTENT_DIR, item)
-        output_filename = f"{item}.html"
-        output_path = os.path.join(LIVE_DIR, output_filename)
-        
-        print(f"Processing Section: {item} -> {output_filename}")
-        
-        # Parse config for theme
-        config = parse_config(section_path)
-        # Default themes if not specified
-        theme_class = ""
-        if 'base' in config: # e.g. base: base
-            pass 
-        if 'cards' in config: # e.g. cards: executive
-            # Map simplified config names to our SCSS theme classes
-            # Announcements use 'theme-announcement-X', People use 'theme-people-X'
-            # Let's map generically:
-            theme_val = config['cards']
-            if theme_val.lower() != 'none':
-                # We check context based on folder name
-                if item in ['People', 'Contact']:
-                    theme_class = f"theme-people-{theme_val}"
-                else:
-                     theme_class = f"theme-announcement-{theme_val}"
-        
-        # Collect content
-        page_body = ""
-        
-        # Gather markdown files
-        md_files = []
-        for f in os.listdir(section_path):
-            if DATE_FILE_REGEX.match(f):
-                md_files.append(f)
-            # handle non-dated MD files? e.g. Introduction.md
-            elif f.endswith('.md') and f not in ['header.md', 'footer.md']:
-                 md_files.append(f)
-
-        md_files.sort() # sort by name (date)
+    print(f"Processing Section: {item} -> {output_filename}")
+    
+    # Default themes if not specified
+    theme_class = ""
+    if 'base' in config: # e.g. base: base
+        pass 
+    if 'cards' in config: # e.g. cards: executive
+        # Map simplified config names to our SCSS theme classes
+        # Announcements use 'theme-announcement-X', People use 'theme-people-X'
+        # Let's map generically:
+        theme_val = config['cards']
+        if theme_val.lower() != 'none':
+            # We check context based on folder name
+            if item in ['People', 'Contact']:
+                theme_class = f"theme-people-{theme_val}"
+            else:
+                 theme_class = f"theme-announcement-{theme_val}"
+    
+    # Collect content
+    page_body = ""
+    has_code = False
+    
+    # If it's a "People" grid, we want a grid container
+    if item == 'People':
+        page_body += '<div class="team-grid">'
+    elif item in ['Announcements', 'Solutions', 'About']:
+         page_body += '<div class="posts-container">'
+    
+    for md_file in md_files:
+        md_path = os.path.join(CONTENT_DIR, item, md_file)
+        content_html, md_has_code = parse_md_file(md_path)
+        has_code = has_code or md_has_code
         
-        # If it's a "People" grid, we want a grid container
-        if item == 'People':
-            page_body += '<div class="team-grid">'
-        elif item in ['Announcements', 'Solutions', 'About']:
-             page_body += '<div class="posts-container">'
+        # Wrap content in a card if needed based on theme
+        # The SCSS expects .post-card or .team-card inside the theme wrapper
         
-        for md_file in md_files:
-            md_path = os.path.join(section_path, md_file)
-            content_html = parse_md_file(md_path)
-            
-            # Wrap content in a card if needed based on theme
-            # The SCSS expects .post-card or .team-card inside the theme wrapper
-            
-            # For simplicity, we wrap every MD file's content in a card div
-            if item == 'People':
-                 # People MDs usually contained keys like Name: Role: etc. 
-                 # We might needs a specialized parser for "People" to make strict cards
-                 # For now, just wrap the raw HTML
-                 page_body += f'<div class="team-card"><div>{content_html}</div></div>'
-            else:
-                 page_body += f'<div class="post-card"><div class="post-content">{content_html}</div></div>'
-                 
+        # For simplicity, we wrap every MD file's content in a card div
         if item == 'People':
-            page_body += '</div>' # close team-grid
-        elif item in ['Announcements', 'Solutions', 'About']:
-             page_body += '</div>' # close posts-container
+             # People MDs usually contained keys like Name: Role: etc. 
+             # We might needs a specialized parser for "People" to make strict cards
+             # For now, just wrap the raw HTML
+             page_body += f'<div class="team-card"><div>{content_html}</div></div>'
+        else:
+             page_body += f'<div class="post-card"><div class="post-content">{content_html}</div></div>'
+             
+    if item == 'People':
+        page_body += '</div>' # close team-grid
+    elif item in ['Announcements', 'Solutions', 'About']:
+         page_body += '</div>' # close posts-container
 
-        # Assemble Full Page
-        nav_html = generate_navbar_html(item, nav_items)
-        
-        full_html = f"""<!DOCTYPE html>
+    # Assemble Full Page
+    nav_html = generate_navbar_html(item, nav_items)
+    highlight_link = '<link rel="stylesheet" href="css/highlight.css">' if has_code else ''
+    
+    full_html = f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{item} - Aurel Systems</title>
     <link rel="stylesheet" href="css/style.css">
+    {highlight_link}
 </head>
 <body class="{theme_class}">
     <header>
@@ -191,17 +276,140 @@ def generate_html_pages(nav_items):
 </body>
 </html>"""
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(full_html)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(full_html)
+
+def file_signature(path):
+    """(mtime_ns, size) of a file or directory, None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+def load_snapshot():
+    """The last build's snapshot, or {} if missing, unreadable or from other generator code."""
+    try:
+        with open(SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if snapshot.get('version') != SNAPSHOT_VERSION or \
+       snapshot.get('generator') != file_signature(os.path.abspath(__file__)):
+        return {}
+    return snapshot
+
+def save_snapshot(snapshot):
+    ensure_dir(CACHE_DIR)
+    snapshot['version'] = SNAPSHOT_VERSION
+    snapshot['generator'] = file_signature(os.path.abspath(__file__))
+    tmp_path = SNAPSHOT_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(tmp_path, SNAPSHOT_FILE)
+
+def scan_content(previous):
+    """
+    Content tree: navigation items and, per section, its parsed config and
+    markdown files with their signatures. Directory listings and configs
+    are reused from the previous snapshot while the directory (or config)
+    mtime is unchanged; only the markdown files are stat'ed every build.
+    """
+    old_sections = previous.get('sections', {})
+    content_sig = file_signature(CONTENT_DIR)
+    if previous and previous.get('dir') == content_sig:
+        nav_items = previous['nav_items']
+    else:
+        nav_items = get_navigation_items()
+
+    sections = {}
+    for item in nav_items:
+        section_path = os.path.join(CONTENT_DIR, item)
+        dir_sig = file_signature(section_path)
+        config_sig = file_signature(os.path.join(section_path, 'config'))
+        old = old_sections.get(item)
+        listing_valid = old is not None and old['dir'] == dir_sig
+        sections[item] = {
+            'dir': dir_sig,
+            'md_files': old['md_files'] if listing_valid else list_md_files(section_path),
+            'config_sig': config_sig,
+            'config': old['config'] if listing_valid and old['config_sig'] == config_sig
+                      else parse_config(section_path),
+        }
+        sections[item]['md_sigs'] = [file_signature(os.path.join(section_path, md_file))
+                                     for md_file in sections[item]['md_files']]
+    return {'dir': content_sig, 'nav_items': nav_items, 'sections': sections}
+
+def scan_assets(previous):
+    """
+    Asset manifest: signatures of every file under the styles directory
+    (main.scss and its imports) plus the highlight style. The file list is
+    reused while no styles directory mtime has changed.
+    """
+    old_dirs = previous.get('dirs', {})
+    if old_dirs and previous.get('styles') and all(file_signature(d) == sig for d, sig in old_dirs.items()):
+        dirs = old_dirs
+        paths = list(previous['styles'])
+    else:
+        dirs, paths = {}, []
+        for dirpath, dirnames, filenames in os.walk(STYLES_DIR):
+            dirs[dirpath] = file_signature(dirpath)
+            paths.extend(os.path.join(dirpath, name) for name in filenames)
+    return {
+        'dirs': dirs,
+        'styles': {path: file_signature(path) for path in sorted(paths)},
+        'highlight_style': HIGHLIGHT_STYLE,
+    }
+
+def render_key(item, content):
+    """Everything a section page depends on; a changed key means re-render."""
+    section = content['sections'][item]
+    key = [content['nav_items'], item, section['config'], section['md_files'],
+           section['md_sigs'], datetime.now().year]
+    return hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
 
 def main():
+    started = time.perf_counter()
+    snapshot = load_snapshot()
+    content = scan_content(snapshot.get('content', {}))
+    assets = scan_assets(snapshot.get('assets', {}))
+    old_assets = snapshot.get('assets', {})
+    render_cache = snapshot.get('render_cache', {})
+
+    keys = {item: render_key(item, content) for item in content['nav_items']}
+    stale_pages = [item for item in content['nav_items']
+                   if render_cache.get(item) != keys[item] or
+                   not os.path.exists(os.path.join(LIVE_DIR, f"{item}.html"))]
+    css_stale = old_assets.get('styles') != assets['styles'] or not old_assets.get('css_ok') or \
+                not os.path.exists(CSS_OUTPUT_FILE)
+    highlight_stale = old_assets.get('highlight_style') != HIGHLIGHT_STYLE or \
+                      not os.path.exists(HIGHLIGHT_CSS_FILE)
+
+    if not (stale_pages or css_stale or highlight_stale):
+        if snapshot.get('content') != content:
+            # Only directory mtimes moved (e.g. a file touched and removed)
+            save_snapshot(dict(snapshot, content=content, assets=dict(assets, css_ok=True)))
+        print(f"Site is up to date ({(time.perf_counter() - started) * 1000:.0f} ms).")
+        return
+
     print("Starting Site Generator...")
     clean_and_prepare_live()
-    compile_sass()
+    # A failed compile is recorded, so the next build tries again
+    assets['css_ok'] = compile_sass() if css_stale else True
+    if highlight_stale:
+        write_highlight_css()
     
-    nav_items = get_navigation_items()
-    generate_html_pages(nav_items)
-    print("Done.")
+    for item in stale_pages:
+        section = content['sections'][item]
+        generate_section_page(item, content['nav_items'], section['config'], section['md_files'])
+        render_cache[item] = keys[item]
+
+    save_snapshot({
+        'content': content,
+        'assets': assets,
+        'render_cache': {item: render_cache[item] for item in content['nav_items']},
+    })
+    print(f"Done ({len(stale_pages)} of {len(content['nav_items'])} pages rebuilt).")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file